@@ -6,31 +6,102 @@ Parameters to tune:
 1. Alpha (Recency Decay): [0.3, 0.5, 0.7, 1.0]
 2. Sim Threshold: [0.01, 0.05, 0.1]
 3. History Weight: [0.3, 0.5, 0.7, 0.9]
+4. Neighbours per user (top-N): [all, 50, 10]
 
 Target: Maximize MAP@10 
+
+Usage: python "Recommender 1.1.py" [--workers N] [--engine cf|als|item] [--compact]
+                                  [--search grid|halving] [--results-db PATH] [--trace PATH]
+                                  [--trace-memory]
+  --workers N  spread the grid over N processes (default 1 = serial;
+               grid search only)
+  --compact    float32 / uint8 values and int32 indices for S_self, X_bin
+               and Sim_User (about half the memory, same MAP@10 within 1e-3)
+  --search     grid (default): every combination on every test user
+               halving: successive halving on growing user samples
+               (recommender/halving.py), same best config here in ~40%
+               of the time; serial, and its sample scores are not stored
+               (--workers > 1 and --results-db are rejected)
+  --results-db PATH
+               SQLite store of evaluated configs, grid search only (default
+               cache/results.sqlite, '' to disable): configs already evaluated on the same data,
+               split and model version are not evaluated again
+               (query it with python -m recommender.results_store)
+  --trace PATH time / CPU / max RSS / nnz of every stage and grid cell
+               as JSON lines, summarized in a table at the end
+  --trace-memory
+               with --trace, also per-span peak memory (tracemalloc; slows
+               allocation-heavy stages down several times, so the timings
+               of a traced-memory run are not representative)
+  --engine     cf (default): grid search of the user-based CF above
+               als: implicit matrix factorization (recommender/als.py),
+               evaluated on the same split and written the same way
+               item: item-item CF on a precomputed top-N book similarity
+               (recommender/item_cf.py), same split and output
 """
 
 import pandas as pd
 import numpy as np
-from scipy.sparse import csr_matrix
-from sklearn.model_selection import train_test_split
-from collections import defaultdict
-import itertools
 import time
+import argparse
+
+from recommender import (evaluation, grid_search, halving, instrument, matrices, parallel,
+                         results_store, split)
+from recommender.als import ALSModel
+from recommender.item_cf import ItemCFModel
+from recommender.model import UserCFModel
+
+
+parser = argparse.ArgumentParser(description="User-based CF grid search + submission")
+parser.add_argument('--workers', type=int, default=1,
+                    help="number of processes, grid search only (default: 1, serial)")
+parser.add_argument('--engine', choices=['cf', 'als', 'item'], default='cf',
+                    help="cf: user-based CF grid search (default), als: matrix factorization, "
+                         "item: item-item CF")
+parser.add_argument('--compact', action='store_true',
+                    help="store the CF matrices as float32 / uint8 with int32 indices")
+parser.add_argument('--search', choices=['grid', 'halving'], default='grid',
+                    help="cf engine only: exhaustive grid (default) or successive halving")
+parser.add_argument('--results-db', default=None, metavar='PATH',
+                    help="grid search only: store of evaluated configs "
+                         "(default cache/results.sqlite), '' to disable")
+parser.add_argument('--trace', default=None, metavar='PATH',
+                    help="write stage timing / memory spans as JSON lines to PATH")
+parser.add_argument('--trace-memory', action='store_true',
+                    help="with --trace: per-span tracemalloc peaks (distorts the timings)")
+args = parser.parse_args()
+if args.search == 'halving':
+    # Rounds score configs on user samples: nothing to share with the grid's store
+    if args.workers > 1:
+        parser.error("--search halving runs serially, --workers must be 1")
+    if args.results_db is not None:
+        parser.error("--search halving does not use --results-db")
+if args.results_db is None:
+    args.results_db = 'cache/results.sqlite'
+
+SPLIT_CACHE_DIR = 'cache'
+MODEL_DIR = 'model'
+
+if args.trace:
+    # Stage / grid cell spans as JSON lines (recommender/instrument.py)
+    instrument.configure(args.trace, trace_memory=args.trace_memory)
 
 
 # 1. DATA LOADING
 print("\n[1/5] Loading data...")
 
-interactions = pd.read_csv('/Users/alexandrecagnin/Kaggle_datas/original_df/interactions.csv')
-interactions['date'] = pd.to_datetime(interactions['t'], unit='s')
+with instrument.span('load') as span:
+    interactions = pd.read_csv('/Users/alexandrecagnin/Kaggle_datas/original_df/interactions.csv')
+    interactions['date'] = pd.to_datetime(interactions['t'], unit='s')
+    span.set(rows=len(interactions))
 
 # Mappings
-users = sorted(interactions['u'].unique())
-all_items = sorted(interactions['i'].unique())
-user_map = {u: i for i, u in enumerate(users)}
-item_map = {i: j for j, i in enumerate(all_items)}
-idx_to_item = {j: i for i, j in item_map.items()}
+with instrument.span('mapping'):
+    users = sorted(interactions['u'].unique())
+    all_items = sorted(interactions['i'].unique())
+    user_map = {u: i for i, u in enumerate(users)}
+    item_map = {i: j for j, i in enumerate(all_items)}
+    idx_to_item = {j: i for i, j in item_map.items()}
 
 n_users = len(users)
 n_items = len(all_items)
@@ -38,219 +109,131 @@ n_items = len(all_items)
 print(f"✓ Interactions: {len(interactions):,}")
 
 # 2. CORE FUNCTIONS
-def build_matrices(interactions_df, alpha, sim_threshold):
-    # Self-History (Recency)
-    max_time = interactions_df['t'].max()
-    rows, cols, data = [], [], []
-    for _, row in interactions_df.iterrows():
-        u = user_map[row['u']]
-        i = item_map[row['i']]
-        days_ago = (max_time - row['t']) / 86400
-        score = 1.0 / ((days_ago + 1) ** alpha)
-        rows.append(u)
-        cols.append(i)
-        data.append(score)
-    S_self = csr_matrix((data, (rows, cols)), shape=(n_users, n_items))
-    
-    # User Similarity (Overlap)
-    # Note: Similarity calculation doesn't depend on alpha, but threshold does filtering
-    # To save time, we compute raw similarity ONCE and filter later?
-    # No, let's just re-compute efficiently.
-    
-    data_bin = np.ones(len(rows))
-    X_bin = csr_matrix((data_bin, (rows, cols)), shape=(n_users, n_items))
-    Intersection = X_bin.dot(X_bin.T)
-    user_counts = np.array(X_bin.sum(axis=1)).flatten()
-    
-    coo = Intersection.tocoo()
-    rows_sim, cols_sim, data_sim = [], [], []
-    for i, j, v in zip(coo.row, coo.col, coo.data):
-        if i == j: continue
-        union = user_counts[i] + user_counts[j] - v
-        if union > 0:
-            sim = v / union
-            if sim > sim_threshold:
-                rows_sim.append(i)
-                cols_sim.append(j)
-                data_sim.append(sim)
-    Sim_User = csr_matrix((data_sim, (rows_sim, cols_sim)), shape=(n_users, n_users))
-    
-    return S_self, Sim_User
-
-def evaluate_model(train_df, test_users, test_actual, alpha, sim_threshold, w_history):
-    # Build Matrices
-    S_self, Sim_User = build_matrices(train_df, alpha, sim_threshold)
-    
-    # Pre-compute Collab scores for efficiency?
-    # No, do per-user to save memory
-    
-    aps = []
-    
-    # Optimization: Process in batches or just loop
-    # For grid search speed, we'll use a subset of test users if needed, but let's try full
-    
-    for user in test_users:
-        if user not in test_actual: continue
-        u_idx = user_map[user]
-        
-        # History Score
-        s_history = S_self[u_idx].toarray().flatten()
-        
-        # Collab Score
-        user_sims = Sim_User[u_idx]
-        s_collab = user_sims.dot(S_self).toarray().flatten()
-        
-        # Combine
-        # w_history * History + (1-w_history) * Collab
-        # Note: Collab scores are usually smaller (sum of sims < 1.0 often), while History is ~1.0
-        # We might need to normalize, but let's stick to the simple weighted sum for now
-        
-        final_scores = s_history * w_history + s_collab * (1.0 - w_history)
-        
-        # Rank
-        top_indices = np.argsort(final_scores)[::-1][:10]
-        recs = [idx_to_item[idx] for idx in top_indices]
-        
-        # MAP
-        actual = test_actual[user]
-        hits = 0
-        precision_sum = 0
-        for rank, item in enumerate(recs[:len(actual)], 1): # Standard MAP@K usually checks top 10
-             # Wait, MAP@10 checks top 10 regardless of actual size?
-             # Kaggle metric: "Mean Average Precision @ 10"
-             pass
-             
-        for rank, item in enumerate(recs, 1):
-            if item in actual:
-                hits += 1
-                precision_sum += hits / rank
-        
-        aps.append(precision_sum / min(len(actual), 10))
-        
-    return np.mean(aps)
+def build_ground_truth(test_users, test_actual):
+    # Sparse (eval users x items) ground truth for recommender/evaluation.py
+    eval_users = [user for user in test_users if user in test_actual]
+    eval_rows = np.array([user_map[user] for user in eval_users])
+    truth_rows = [pos for pos, user in enumerate(eval_users) for _ in test_actual[user]]
+    truth_cols = [item_map[item] for user in eval_users for item in test_actual[user]]
+    truth = evaluation.ground_truth(truth_rows, truth_cols, (len(eval_users), n_items))
+    return eval_users, eval_rows, truth
 
 # 3. GRID SEARCH
 print("\n[2/5] Preparing Grid Search...")
 
 # Split Data
-train_users, test_users = train_test_split(users, test_size=0.2, random_state=42)
-train_users_set = set(train_users)
-
-interactions_sorted = interactions.sort_values(['u', 't'])
-train_indices = []
-test_actual = defaultdict(set)
-
-for user in users:
-    user_ints = interactions_sorted[interactions_sorted['u'] == user]
-    if user in train_users_set:
-        train_indices.extend(user_ints.index)
-    else:
-        n = len(user_ints)
-        split = int(n * 0.8)
-        train_indices.extend(user_ints.index[:split])
-        test_items = user_ints.iloc[split:]['i'].tolist()
-        test_actual[user] = set(test_items)
-
-train_df = interactions.loc[train_indices]
+# 80/20 per-user temporal holdout on 20% of the users, cached on disk
+# (recommender/split.py: one sort + groupby cumcount, no per-user filtering)
+with instrument.span('split') as span:
+    train_df, test_df = split.cached_per_user_split(interactions, SPLIT_CACHE_DIR,
+                                                    test_size=0.2, ratio=0.8, seed=42)
+    test_actual = split.test_sets(test_df)
+    test_users = sorted(test_actual)
+    span.set(train_rows=len(train_df), test_rows=len(test_df))
 
 # Define Grid
 alphas = [0.3, 0.5, 0.7, 1.0]
 thresholds = [0.01, 0.05, 0.1]
 weights = [0.3, 0.5, 0.7, 0.9]
-
-best_score = -1
-best_params = {}
-
-print(f"  Testing {len(alphas) * len(thresholds) * len(weights)} combinations...")
-print(f"  {'Alpha':<10} {'Thresh':<10} {'Weight':<10} {'MAP@10':<10} {'Time':<10}")
-print("-" * 60)
-
-# Loop
-for alpha, thresh in itertools.product(alphas, thresholds):
-    # Build matrices once per (alpha, thresh) pair
-    start_build = time.time()
-    S_self, Sim_User = build_matrices(train_df, alpha, thresh)
-    build_time = time.time() - start_build
-    
-    # Pre-calculate Collab part to speed up weight tuning?
-    # Actually, we can just run the eval loop for each weight
-    
-    for w in weights:
-        start_eval = time.time()
-        
-        # Custom eval loop reusing matrices
-        aps = []
-        for user in test_users:
-            if user not in test_actual: continue
-            u_idx = user_map[user]
-            
-            s_history = S_self[u_idx].toarray().flatten()
-            user_sims = Sim_User[u_idx]
-            s_collab = user_sims.dot(S_self).toarray().flatten()
-            
-            final_scores = s_history * w + s_collab * (1.0 - w)
-            
-            top_indices = np.argsort(final_scores)[::-1][:10]
-            recs = [idx_to_item[idx] for idx in top_indices]
-            
-            actual = test_actual[user]
-            hits = 0
-            precision_sum = 0
-            for rank, item in enumerate(recs, 1):
-                if item in actual:
-                    hits += 1
-                    precision_sum += hits / rank
-            aps.append(precision_sum / min(len(actual), 10))
-            
-        score = np.mean(aps)
-        eval_time = time.time() - start_eval
-        
-        print(f"  {alpha:<10} {thresh:<10} {w:<10} {score:.5f}      {eval_time:.1f}s")
-        
-        if score > best_score:
-            best_score = score
-            best_params = {'alpha': alpha, 'thresh': thresh, 'w': w}
+# Per-user neighbour cap (None = every neighbour above the threshold)
+top_ns = [None, 50, 10]
+
+if args.engine == 'cf':
+    print(f"  Testing {len(alphas) * len(thresholds) * len(top_ns) * len(weights)} combinations...")
+
+# Raw Jaccard is computed once, S_self once per alpha, and the w sweep
+# only blends precomputed score blocks (recommender/grid_search.py)
+eval_users, eval_rows, truth = build_ground_truth(test_users, test_actual)
+
+ENGINES = {'als': ALSModel, 'item': ItemCFModel}
+
+with instrument.span('search', engine=args.engine):
+    if args.engine in ENGINES:
+        # Matrix factorization (recommender/als.py) or item-item CF
+        # (recommender/item_cf.py): no grid, same split and metrics
+        start_fit = time.time()
+        engine = ENGINES[args.engine]().fit(train_df)
+        fit_time = time.time() - start_fit
+        top_indices = np.searchsorted(all_items, engine.recommend(eval_users, k=10))
+        metrics = evaluation.evaluate(top_indices, truth, k=10)
+        best = {'score': metrics['MAP@10'], 'metrics': metrics}
+        best_score = best['score']
+        best_params = engine.params()
+        print(f"  {args.engine} trained in {fit_time:.1f}s, model: {engine.nbytes() / 2**20:.1f} MB")
+    else:
+        # MAP@10 ranks the configs; recall, NDCG, hit rate and coverage come for free
+        score_fn = lambda top_indices: evaluation.evaluate(top_indices, truth, k=10)
+        if args.search == 'halving':
+            # Every config on 200 stratified test users, the best third on 3x more, ...
+            configs = halving.sample_configs({'alpha': alphas, 'thresh': thresholds,
+                                              'top_n': top_ns, 'w': weights})
+            rounds = halving.successive_halving(
+                train_df, np.asarray(users), np.asarray(all_items), eval_rows, truth, configs,
+                min_users=200, eta=3, k=10, metric='MAP@10', compact=args.compact)
+            results = rounds[-1]['results']
+            print(f"  {halving.evaluations(rounds):,} config x user evaluations "
+                  f"(grid: {len(configs) * len(eval_rows):,})")
+        else:
+            # Configs already in the results store are reused, new ones recorded
+            store = results_store.ResultStore(args.results_db) if args.results_db else None
+            context = results_store.run_context(interactions, split_seed=42, test_size=0.2, ratio=0.8)
+            if args.workers > 1:
+                # Matrices go to shared memory, cells run over a process pool (recommender/parallel.py)
+                results = parallel.parallel_grid_search(
+                    train_df, np.asarray(users), np.asarray(all_items), eval_rows, score_fn,
+                    alphas, thresholds, weights, k=10, metric='MAP@10', top_ns=top_ns,
+                    workers=args.workers, compact=args.compact, store=store, context=context)
+            else:
+                results = grid_search.grid_search(
+                    train_df, np.asarray(users), np.asarray(all_items), eval_rows, score_fn,
+                    alphas, thresholds, weights, k=10, metric='MAP@10', top_ns=top_ns,
+                    compact=args.compact, store=store, context=context)
+            if store is not None:
+                store.close()
+
+        best = grid_search.best_result(results)
+        best_score = best['score']
+        best_params = {'alpha': best['alpha'], 'thresh': best['thresh'], 'top_n': best['top_n'], 'w': best['w']}
 
 print("\n" + "="*60)
 print(f"BEST RESULT: MAP@10 = {best_score:.5f}")
 print(f"Parameters: {best_params}")
+for name, value in best['metrics'].items():
+    print(f"  {name:<12} {value:.5f}")
 print("="*60)
 
 # 4. FINAL SUBMISSION
 
-alpha = best_params['alpha']
-thresh = best_params['thresh']
-w = best_params['w']
-
-S_self_full, Sim_User_full = build_matrices(interactions, alpha, thresh)
-
-recommendations = []
-for i, user in enumerate(users):
-    u_idx = user_map[user]
-    
-    s_history = S_self_full[u_idx].toarray().flatten()
-    user_sims = Sim_User_full[u_idx]
-    s_collab = user_sims.dot(S_self_full).toarray().flatten()
-    
-    final_scores = s_history * w + s_collab * (1.0 - w)
-    
-    top_indices = np.argsort(final_scores)[::-1][:10]
-    recs = [idx_to_item[idx] for idx in top_indices]
-    
-    # Fallback
-    if len(recs) < 10:
-        popular = interactions['i'].value_counts().index.tolist()
-        for item in popular:
-            if item not in recs:
-                recs.append(item)
-                if len(recs) >= 10: break
-    
-    rec_str = ' '.join(map(str, recs[:10]))
-    recommendations.append({'user_id': user, 'recommendation': rec_str})
-    
-    if (i+1) % 1000 == 0:
-        print(f"    Processed {i+1} users...")
-
-sub_df = pd.DataFrame(recommendations)
-sub_df.to_csv('submission.csv', index=False)
-print("✓ Saved to submission.csv")
+# Fit on all interactions and persist, so predictions no longer need a rerun
+# (UserCFModel / ALSModel / ItemCFModel.load(MODEL_DIR) memory-map the saved arrays)
+# and "python -m recommender.service --model model" serves them over HTTP
+with instrument.span('final_fit', engine=args.engine, rows=len(interactions)):
+    if args.engine in ENGINES:
+        model = ENGINES[args.engine](**best_params).fit(interactions)
+    else:
+        alpha = best_params['alpha']
+        thresh = best_params['thresh']
+        w = best_params['w']
+        top_n = best_params['top_n']
+        model = UserCFModel(alpha=alpha, sim_threshold=thresh, w_history=w, top_n=top_n,
+                            compact=args.compact).fit(interactions)
+        matrices.print_memory_report(model.named_matrices())
+    model.save(MODEL_DIR)
+    print(f"✓ Model saved to {MODEL_DIR}/")
+
+with instrument.span('submission', users=len(users)):
+    # Batched top-10 for every user at once
+    top_items = model.recommend(users, k=10)
+
+    recommendations = []
+    for user, recs in zip(users, top_items):
+        rec_str = ' '.join(map(str, recs[:10]))
+        recommendations.append({'user_id': user, 'recommendation': rec_str})
+
+    sub_df = pd.DataFrame(recommendations)
+    sub_df.to_csv('submission.csv', index=False)
+    print("✓ Saved to submission.csv")
+
+if args.trace:
+    print(f"\nTrace written to {args.trace}")
+    instrument.print_summary(instrument.load(args.trace))
@@ -1,6 +1,7 @@
 import streamlit as st
 import streamlit.components.v1 as components
-from src.data_loader import load_data, get_demo_users_json
+from src import wire_format
+from src.data_loader import load_data, load_borrows, data_version, publish_book_data
 from src.book_renderer import generate_book_html
 from src.config import COMPONENT_HEIGHT
 from src.statistics import calculate_global_stats, calculate_user_stats, prepare_cluster_data, calculate_book_stats
@@ -11,7 +12,8 @@ st.set_page_config(page_title="Magic Book Animation", layout="wide")
 
 def main():
     # 1. Load Data
-    submissions, history, items_map = load_data()
+    submissions, history, items_df = load_data()
+    borrows = load_borrows()
     
     # Navigation
     with st.sidebar:
@@ -42,21 +44,16 @@ section[data-testid="stSidebar"] {
 </style>
 """, unsafe_allow_html=True)
         
-        # 2. Prepare JSON for Frontend (Demo Users)
-        users_json = get_demo_users_json(submissions, history, items_map)
+        # 2. Publish the item table and per-user profiles; the frontend only gets the user index
+        user_index_json, data_url = publish_book_data(submissions, borrows, items_df, data_version())
         
         # 3. Prepare Recommendation Data
         # Calculate on the fly or load. Since it uses cache, it's fast.
-        from src.data_loader import ITEMS_ENRICHED_PATH
-        import pandas as pd
-        import json
-        items_df = pd.read_csv(ITEMS_ENRICHED_PATH)
-        
-        cat_recs, all_cats = get_category_recommendations(history, items_df)
-        cat_recs_json = json.dumps(cat_recs)
+        cat_recs, all_cats = get_category_recommendations(borrows, items_df)
+        cat_recs_json = wire_format.dumps(wire_format.category_table(cat_recs))
         
         # 4. Generate HTML
-        book_html = generate_book_html(users_json, cat_recs_json, all_cats)
+        book_html = generate_book_html(user_index_json, data_url, cat_recs_json, all_cats)
         
         # 4. Render
         components.html(book_html, height=COMPONENT_HEIGHT, scrolling=False)
@@ -76,14 +73,10 @@ section[data-testid="stSidebar"] {
 """, unsafe_allow_html=True)
         
         # Calculate Stats
-        from src.data_loader import ITEMS_ENRICHED_PATH
-        import pandas as pd
-        items_df = pd.read_csv(ITEMS_ENRICHED_PATH) 
-        
-        g_stats = calculate_global_stats(history, items_df, submissions)
-        u_stats = calculate_user_stats(history)
+        g_stats = calculate_global_stats(borrows, items_df, history['user_id'])
+        u_stats = calculate_user_stats(borrows, history['user_id'])
         c_data = prepare_cluster_data(items_df)
-        b_stats = calculate_book_stats(history, items_df)
+        b_stats = calculate_book_stats(borrows, items_df)
         
         render_data_insights(g_stats, u_stats, c_data, b_stats)
 
@@ -0,0 +1,151 @@
+import gzip
+import json
+import os
+import shutil
+import subprocess
+import tempfile
+import time
+
+import numpy as np
+from src import data_store, wire_format
+from src.config import SUBMISSION_PATH, ITEMS_ENRICHED_PATH, USER_HISTORY_PATH, DATA_CACHE_DIR
+from src.data_loader import _user_payloads
+from src.recommender_engine import get_category_recommendations
+from src.statistics import calculate_book_stats
+
+REPEAT = 5
+
+# Parses a payload file and decodes it like the book does (see book_renderer.py)
+NODE_PARSE = """
+const fs = require('fs');
+const text = fs.readFileSync(process.argv[2], 'utf8');
+const unpack = p => { const b = Buffer.from(p.data, 'base64');
+  return p.dtype === 'uint16' ? new Uint16Array(b.buffer, b.byteOffset, b.length / 2)
+                              : new Uint32Array(b.buffer, b.byteOffset, b.length / 4); };
+let best = Infinity;
+for (let r = 0; r < %d; r++) {
+  const start = process.hrtime.bigint();
+  const data = JSON.parse(text);
+  if (data.author_index) unpack(data.author_index);
+  if (data.offsets) { unpack(data.offsets); unpack(data.items); }
+  best = Math.min(best, Number(process.hrtime.bigint() - start) / 1e6);
+}
+console.log(best);
+""" % REPEAT
+
+
+def legacy_users_data(submissions_df, history_df, items_df):
+    """
+    USERS_DATA as the book received it before the wire format: every
+    user's history / recommendations as {Title, Author} objects, parsed
+    from the raw CSV strings like the old get_demo_users_json.
+    """
+    items_map = items_df.set_index('i')[['Title', 'Author']].astype(object).to_dict('index')
+    history_by_user = dict(zip(history_df['user_id'], history_df['books_borrowed']))
+    recs_by_user = dict(zip(submissions_df['user_id'], submissions_df['recommendation']))
+    users_data = {}
+    for uid in sorted(submissions_df['user_id'].unique()):
+        lists = {}
+        for key, raw, sep in (('history', history_by_user.get(uid), ','),
+                              ('recommendations', recs_by_user.get(uid), ' ')):
+            ids = [int(x.strip()) for x in raw.split(sep) if x.strip().isdigit()] if isinstance(raw, str) else []
+            lists[key] = [items_map[i] for i in ids if i in items_map]
+        users_data[int(uid)] = lists
+    return users_data
+
+
+def legacy_category_data(borrows_df, items_df):
+    """
+    CATEGORY_DATA before the wire format: top 20 books of every main
+    category, by borrow count, as {Title, Author} objects.
+    """
+    borrow_counts_df, _, _ = calculate_book_stats(borrows_df, items_df)
+    return {cat: books.head(20)[['Title', 'Author']].astype(object).to_dict('records')
+            for cat, books in borrow_counts_df.groupby('Main_Category', sort=False)}
+
+
+def python_parse_ms(text):
+    times = []
+    for _ in range(REPEAT):
+        start = time.perf_counter()
+        json.loads(text)
+        times.append(time.perf_counter() - start)
+    return min(times) * 1000
+
+
+def node_parse_ms(text, tmp_dir):
+    if shutil.which('node') is None:
+        return None
+    path = os.path.join(tmp_dir, 'payload.json')
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(text)
+    script = os.path.join(tmp_dir, 'parse.js')
+    with open(script, 'w') as f:
+        f.write(NODE_PARSE)
+    return float(subprocess.run(['node', script, path], capture_output=True, text=True, check=True).stdout)
+
+
+# Load Data
+print("Loading data...")
+submissions = data_store.load_table(SUBMISSION_PATH, data_store.SUBMISSION_SCHEMA, DATA_CACHE_DIR)
+history = data_store.load_table(USER_HISTORY_PATH, data_store.HISTORY_SCHEMA, DATA_CACHE_DIR)
+items = data_store.load_table(ITEMS_ENRICHED_PATH, data_store.ITEMS_SCHEMA, DATA_CACHE_DIR)
+borrows = data_store.explode_history(history)
+
+# 1. Wire format payloads
+user_ids, profiles = _user_payloads(submissions, borrows, items)
+category_recs, _ = get_category_recommendations(borrows, items)
+item_table = wire_format.item_table(items)
+wire = {
+    'user index': wire_format.dumps(wire_format.delta_encode(user_ids)),
+    'categories': wire_format.dumps(wire_format.category_table(category_recs)),
+    'item table': wire_format.dumps(item_table),
+}
+
+# 2. Decode the wire payloads back into today's format
+titles = item_table['titles']
+authors = np.array(item_table['authors'], dtype=object)[wire_format.unpack_array(item_table['author_index'])]
+books = [{"Title": title, "Author": author} for title, author in zip(titles, authors)]
+users_data = {}
+for uid, profile in zip(user_ids, profiles):
+    profile = json.loads(profile)
+    users_data[int(uid)] = {key: [books[i] for i in wire_format.delta_decode(profile[key])]
+                            for key in ('history', 'recommendations')}
+table = json.loads(wire['categories'])
+offsets, flat = wire_format.unpack_array(table['offsets']), wire_format.unpack_array(table['items'])
+category_data = {name: [books[i] for i in flat[offsets[k]:offsets[k + 1]]] for k, name in enumerate(table['names'])}
+
+# ... and compare with today's payloads, built independently from the raw tables
+print("Comparing with the previous JSON payloads...")
+legacy_users = legacy_users_data(submissions, history, items)
+legacy_categories = legacy_category_data(borrows, items)
+assert users_data == legacy_users, "Decoded users differ from the previous USERS_DATA!"
+assert json.dumps(category_data) == json.dumps(legacy_categories), \
+    "Decoded categories differ from the previous CATEGORY_DATA!"
+print(f"✓ Lossless: {len(users_data)} users (history + recommendations) and {len(category_data)} categories")
+today = {'USERS_DATA': json.dumps(legacy_users), 'CATEGORY_DATA': json.dumps(legacy_categories)}
+
+# 3. Report
+print("\nPayload sizes and parse times...")
+print(f"  {'Payload':<26} {'KB':>9} {'gzip KB':>9} {'Python ms':>10} {'Node ms':>8}")
+with tempfile.TemporaryDirectory() as tmp_dir:
+    def report(label, text):
+        raw = text.encode('utf-8')
+        node_ms = node_parse_ms(text, tmp_dir)
+        print(f"  {label:<26} {len(raw) / 1024:>9.1f} {len(gzip.compress(raw)) / 1024:>9.1f} "
+              f"{python_parse_ms(text):>10.1f} {'-' if node_ms is None else f'{node_ms:.1f}':>8}")
+        return len(raw)
+
+    print("  Today (inlined in the page)")
+    today_page = sum(report(name, text) for name, text in today.items())
+    print("  Wire format")
+    wire_page = report('user index', wire['user index']) + report('categories', wire['categories'])
+    report('item table (fetched once)', wire['item table'])
+    sizes = [len(p.encode('utf-8')) for p in profiles]
+    largest = profiles[int(np.argmax(sizes))]
+    report('largest user profile', largest)
+
+print(f"\n  Page payload: {today_page / 2**20:.2f} MB -> {wire_page / 2**10:.1f} KB")
+print(f"  All user profiles: {len(today['USERS_DATA']) / 2**20:.2f} MB -> {sum(sizes) / 2**20:.2f} MB "
+      f"(median profile {np.median(sizes):.0f} bytes)")
+print("\nALL CHECKS PASSED!")
@@ -2,10 +2,12 @@
 from .styles import get_book_css
 from .config import BOOK_WIDTH_VW, BOOK_HEIGHT
 
-def generate_book_html(users_json, category_recs_json, all_categories):
+def generate_book_html(user_index_json, data_url, category_recs_json, all_categories):
     """
     Generates the full HTML content for the interactive 3D book.
-    Injects the JSON data for users and sets up the JS logic.
+    Injects the user index and the packed categories (wire_format) and
+    sets up the JS logic; the item table (data_url/items.json) is fetched
+    once and a user's profile (data_url/users/<id>.json) when it is opened.
     """
     
     css = get_book_css(BOOK_WIDTH_VW, BOOK_HEIGHT)
@@ -59,9 +61,76 @@ def generate_book_html(users_json, category_recs_json, all_categories):
 
 <script>
 
+// --- WIRE FORMAT (see src/wire_format.py) ---
+// Books are wire ids: positions in the item table
+
+function unpackTyped(packed) {{
+    const bytes = Uint8Array.from(atob(packed.data), c => c.charCodeAt(0));
+    return packed.dtype === 'uint16' ? new Uint16Array(bytes.buffer) : new Uint32Array(bytes.buffer);
+}}
+
+function undelta(deltas) {{
+    let id = 0;
+    return deltas.map(d => (id += d));
+}}
+
 // --- DATA INJECTION ---
-const USERS_DATA = {users_json};
-const CATEGORY_DATA = {category_recs_json};
+const USER_IDS = undelta({user_index_json});
+const USER_ID_SET = new Set(USER_IDS.map(String));
+const DATA_URL = "{data_url}";
+const CATEGORY_DATA = (function(table) {{
+    // {{ "CategoryName": Uint16Array of wire ids }}
+    const offsets = unpackTyped(table.offsets);
+    const items = unpackTyped(table.items);
+    const categories = {{}};
+    table.names.forEach((name, k) => {{ categories[name] = items.subarray(offsets[k], offsets[k + 1]); }});
+    return categories;
+}})({category_recs_json});
+
+// --- LAZY DATA ---
+// Fetched on first use and kept (as promises, so concurrent requests
+// share a fetch; a failed fetch is dropped so it can be retried)
+const FETCH_CACHE = new Map();
+
+function fetchJSON(path) {{
+    if (!FETCH_CACHE.has(path)) {{
+        const request = fetch(`${{DATA_URL}}/${{path}}`)
+            .then(response => {{
+                if (!response.ok) throw new Error(response.status);
+                // Static files may be served as text/plain
+                return response.text();
+            }})
+            .then(text => JSON.parse(text))
+            .catch(error => {{
+                FETCH_CACHE.delete(path);
+                throw error;
+            }});
+        FETCH_CACHE.set(path, request);
+    }}
+    return FETCH_CACHE.get(path);
+}}
+
+// Item table, decoded once: ITEMS.titles[id], ITEMS.authors[ITEMS.authorIndex[id]]
+let ITEMS = null;
+
+function loadItems() {{
+    return fetchJSON('items.json').then(table => {{
+        if (!ITEMS) {{
+            ITEMS = {{ titles: table.titles, authors: table.authors, authorIndex: unpackTyped(table.author_index) }};
+        }}
+        return ITEMS;
+    }});
+}}
+
+function fetchUserProfile(userId) {{
+    return fetchJSON(`users/${{userId}}.json`).then(profile => ({{
+        history: undelta(profile.history),
+        recommendations: undelta(profile.recommendations)
+    }}));
+}}
+
+// Start downloading the item table while the cover is shown
+loadItems().catch(() => {{}});
 
 // --- VIEW GENERATION ---
 const VIEWS = {{
@@ -135,22 +204,28 @@ const VIEWS = {{
 
 // --- HELPER FUNCTIONS ---
 
-function generateBookListHTML(books) {{
-    if (!books || books.length === 0) return '<p>Aucun livre trouvé.</p>';
-    return books.map(b => `
+function generateBookListHTML(bookIds) {{
+    // Resolves wire ids through the item table (loadItems() must have resolved)
+    if (!bookIds || bookIds.length === 0) return '<p>Aucun livre trouvé.</p>';
+    return Array.from(bookIds, id => `
         <div class="book-item">
-            <div class="book-title">${{b.Title}}</div>
-            <div class="book-author">${{b.Author}}</div>
+            <div class="book-title">${{ITEMS.titles[id]}}</div>
+            <div class="book-author">${{ITEMS.authors[ITEMS.authorIndex[id]]}}</div>
         </div>
     `).join('');
 }}
 
-function loadUserProfile() {{
+async function loadUserProfile() {{
     const userId = document.getElementById('user-select').value;
-    if (!userId) return;
+    if (!userId || !USER_ID_SET.has(userId)) return;
     
-    const data = USERS_DATA[userId];
-    if (!data) return;
+    let data;
+    try {{
+        [data] = await Promise.all([fetchUserProfile(userId), loadItems()]);
+    }} catch (error) {{
+        alert("Profil de l'utilisateur " + userId + " indisponible.");
+        return;
+    }}
 
     // Construct the view for this user
     const userViewKey = 'user_' + userId;
@@ -182,7 +257,7 @@ function loadUserProfile() {{
     flip(userViewKey, 'forward');
 }}
 
-function generateCustomRecs() {{
+async function generateCustomRecs() {{
     const c1 = document.getElementById('cat1').value;
     const c2 = document.getElementById('cat2').value;
     const c3 = document.getElementById('cat3').value;
@@ -192,6 +267,13 @@ function generateCustomRecs() {{
         return;
     }}
     
+    try {{
+        await loadItems();
+    }} catch (error) {{
+        alert("Catalogue indisponible.");
+        return;
+    }}
+    
     // Logic: 5 from C1, 3 from C2, 2 from C3
     const recs = [];
     const seen = new Set();
@@ -202,9 +284,10 @@ function generateCustomRecs() {{
         for (let b of books) {{
             if (added >= count) break;
             // Simple dedupe by title just in case
-            if (!seen.has(b.Title)) {{
+            const title = ITEMS.titles[b];
+            if (!seen.has(title)) {{
                 recs.push(b);
-                seen.add(b.Title);
+                seen.add(title);
                 added++;
             }}
         }}
@@ -245,7 +328,7 @@ function searchUser() {{
     }}
     
     // Check if user exists
-    if (!USERS_DATA[userId]) {{
+    if (!USER_ID_SET.has(userId)) {{
         alert("Utilisateur " + userId + " introuvable.");
         return;
     }}
@@ -262,8 +345,8 @@ function searchUser() {{
 
 function updateSelectOptions() {{
     let optionsHtml = '<option value="" disabled selected>Choisir un ID...</option>';
-    // Only show IDs present in USERS_DATA (Demo Limit)
-    for (const uid in USERS_DATA) {{
+    // Only show IDs present in the user index
+    for (const uid of USER_IDS) {{
         optionsHtml += `<option value="${{uid}}">${{uid}}</option>`;
     }}
     
@@ -3,6 +3,12 @@
 SUBMISSION_PATH = 'submission.csv'
 ITEMS_ENRICHED_PATH = 'Books_Recommander_System-main/items_enriched.csv'
 USER_HISTORY_PATH = 'Books_Recommander_System-main/user_borrowing_history.csv'
+# Columnar binary copies of the CSVs above (src/data_store.py)
+DATA_CACHE_DIR = 'cache/data'
+# Item table and per-user profiles fetched by the book on demand. Streamlit
+# serves ./static/ at app/static/ (server.enableStaticServing, .streamlit/config.toml)
+BOOK_DATA_DIR = 'static/book_data'
+BOOK_DATA_URL = 'app/static/book_data'
 
 # Settings
 DEMO_USER_LIMIT = 50
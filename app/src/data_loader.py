@@ -1,65 +1,102 @@
 
-import pandas as pd
-import json
+import os
+import shutil
+import tempfile
+import numpy as np
 import streamlit as st
-from .config import SUBMISSION_PATH, ITEMS_ENRICHED_PATH, USER_HISTORY_PATH, DEMO_USER_LIMIT
+from . import data_store, wire_format
+from .config import (SUBMISSION_PATH, ITEMS_ENRICHED_PATH, USER_HISTORY_PATH, DATA_CACHE_DIR,
+                     BOOK_DATA_DIR, BOOK_DATA_URL)
 
-@st.cache_data
+# cache_resource: one shared copy for every session (cache_data would hand
+# each rerun its own unpickled copy). Callers must not modify these frames.
+@st.cache_resource
+def load_items():
+    """
+    Loads the item table (typed, categorical text columns) from the columnar cache.
+    Missing Title / Author / Category are already filled by the cache.
+    """
+    return data_store.load_table(ITEMS_ENRICHED_PATH, data_store.ITEMS_SCHEMA, DATA_CACHE_DIR)
+
+@st.cache_resource
 def load_data():
     """
-    Loads usage and recommendation data from CSV files.
+    Loads usage and recommendation data from the columnar cache of the CSV files.
+    Returns the submissions, history and item DataFrames.
     """
-    submissions = pd.read_csv(SUBMISSION_PATH)
-    items = pd.read_csv(ITEMS_ENRICHED_PATH)
-    history = pd.read_csv(USER_HISTORY_PATH)
-    
-    # Create lookup dict for items: i -> {Title, Author}
-    # Handle NaN values gracefully
-    items['Title'] = items['Title'].fillna("Unknown Title")
-    items['Author'] = items['Author'].fillna("Unknown Author")
-    items_dict = items.set_index('i')[['Title', 'Author']].to_dict('index')
+    submissions = data_store.load_table(SUBMISSION_PATH, data_store.SUBMISSION_SCHEMA, DATA_CACHE_DIR)
+    history = data_store.load_table(USER_HISTORY_PATH, data_store.HISTORY_SCHEMA, DATA_CACHE_DIR)
+    items = load_items()
     
-    return submissions, history, items_dict
+    return submissions, history, items
 
-def get_demo_users_json(submissions_df, history_df, items_map):
+@st.cache_resource
+def load_borrows():
     """
-    Prepares a JSON string containing data for the first N users 
-    to be injected into the frontend.
+    Long-form (user_id, item_id, date) borrow table of the history, parsed once.
     """
-    # Filter for first N users
-    all_user_ids = sorted(submissions_df['user_id'].unique())
-    demo_users_ids = all_user_ids
-    
-    users_data = {}
+    _, history, _ = load_data()
+    return data_store.explode_history(history)
+
+def data_version():
+    """
+    Version of the loaded data (hash of the source CSVs), used as cache key.
+    """
+    return data_store.data_version([SUBMISSION_PATH, ITEMS_ENRICHED_PATH, USER_HISTORY_PATH], DATA_CACHE_DIR)
 
-    for uid in demo_users_ids:
-        # User History
-        user_history_row = history_df[history_df['user_id'] == uid]
-        history_books = []
-        if not user_history_row.empty:
-            # Parse '0, 1, 2' string
-            b_ids_str = user_history_row.iloc[0]['books_borrowed']
-            if isinstance(b_ids_str, str):
-                b_ids = [int(x.strip()) for x in b_ids_str.split(',') if x.strip().isdigit()]
-                for bid in b_ids:
-                    if bid in items_map:
-                        history_books.append(items_map[bid])
-        
-        # Recommendations
-        user_rec_row = submissions_df[submissions_df['user_id'] == uid]
-        rec_books = []
-        if not user_rec_row.empty:
-            # Parse '123 456 789' string (space separated)
-            r_str = user_rec_row.iloc[0]['recommendation']
-            if isinstance(r_str, str):
-                r_ids = [int(x.strip()) for x in r_str.split(' ') if x.strip().isdigit()]
-                for rid in r_ids:
-                    if rid in items_map:
-                        rec_books.append(items_map[rid])
-                        
-        users_data[int(uid)] = {
-            "history": history_books, 
-            "recommendations": rec_books 
-        }
+def _wire_ids_by_user(long_df, items_df, user_ids):
+    """
+    Wire ids (wire_format) of every user of user_ids, in long_df row
+    order; items missing from the item table are skipped.
+    """
+    positions = wire_format.wire_ids(items_df, long_df['item_id'])
+    keep = positions >= 0
+    users = long_df['user_id'].to_numpy()[keep]
+    order = np.argsort(users, kind='stable')
+    users, books = users[order], positions[keep][order]
+    starts = np.searchsorted(users, user_ids, side='left')
+    ends = np.searchsorted(users, user_ids, side='right')
+    return [books[start:end] for start, end in zip(starts, ends)]
+
+def _user_payloads(submissions_df, borrows_df, items_df):
+    """
+    Sorted user ids and the JSON profile of each (wire_format.user_profile),
+    built from the long-form borrow / recommendation tables in one pass.
+    """
+    user_ids = np.sort(submissions_df['user_id'].unique())
+    recommendations = data_store.explode_recommendations(submissions_df)
+    history = _wire_ids_by_user(borrows_df, items_df, user_ids)
+    recs = _wire_ids_by_user(recommendations, items_df, user_ids)
+    return user_ids, [wire_format.user_profile(h, r) for h, r in zip(history, recs)]
+
+@st.cache_data
+def publish_book_data(_submissions_df, _borrows_df, _items_df, version):
+    """
+    Writes the book's data, in the wire format, under BOOK_DATA_DIR/<version>/
+    (served by Streamlit's static file serving): items.json, the item
+    table fetched once by the page, and users/<user_id>.json, one profile
+    per user fetched when it is opened. Cached per data version (the
+    frames themselves are not hashed); older versions are removed.
+    Returns the JSON user index (delta-encoded sorted ids) and the URL of the data.
+    """
+    target = os.path.join(BOOK_DATA_DIR, version)
+    user_ids, payloads = _user_payloads(_submissions_df, _borrows_df, _items_df)
+    if not os.path.isdir(target):
+        os.makedirs(BOOK_DATA_DIR, exist_ok=True)
+        tmp = tempfile.mkdtemp(dir=BOOK_DATA_DIR, prefix='.tmp-')
+        with open(os.path.join(tmp, 'items.json'), 'w', encoding='utf-8') as f:
+            f.write(wire_format.dumps(wire_format.item_table(_items_df)))
+        os.makedirs(os.path.join(tmp, 'users'))
+        for uid, payload in zip(user_ids, payloads):
+            with open(os.path.join(tmp, 'users', f"{uid}.json"), 'w', encoding='utf-8') as f:
+                f.write(payload)
+        try:
+            os.replace(tmp, target)
+        except OSError:
+            # Published meanwhile by another process
+            shutil.rmtree(tmp, ignore_errors=True)
+    for name in os.listdir(BOOK_DATA_DIR):
+        if name != version and not name.startswith('.tmp-'):
+            shutil.rmtree(os.path.join(BOOK_DATA_DIR, name), ignore_errors=True)
 
-    return json.dumps(users_data)
+    return wire_format.dumps(wire_format.delta_encode(user_ids)), f"{BOOK_DATA_URL}/{version}"
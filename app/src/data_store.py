@@ -0,0 +1,289 @@
+"""
+Columnar binary cache of the app's CSV inputs.
+
+Each CSV is parsed once, with the explicit dtypes of its schema, into a
+directory of one .npy file per column plus a manifest.json:
+
+- int / float columns are stored as-is (ids as int32),
+- text columns are dictionary-encoded: integer codes plus the distinct
+  values as one UTF-8 blob and its offsets. 'category' columns load back
+  as pandas categoricals (Title, Author, Publisher, Category), 'string'
+  columns as plain str columns.
+
+The manifest records the source's size, mtime and SHA-256. A cache is
+reused while size and mtime match; when they don't, the file is hashed
+and the cache is rebuilt only if the content changed. Missing values of
+a text column can be filled at build time ('fill'), since a categorical
+only accepts values among its categories.
+
+explode_history() turns the comma-joined borrow lists of the history
+table into one long-form (user_id, item_id, date) row per borrow, the
+shape every dashboard statistic is computed from;
+explode_recommendations() does the same for the submission.
+"""
+
+import hashlib
+import json
+import os
+import shutil
+
+import numpy as np
+import pandas as pd
+
+FORMAT_VERSION = 1
+HASH_CHUNK_BYTES = 1 << 20
+
+# column -> kind ('int32', 'float32', 'float64', 'category' or 'string'), optional NaN fill
+ITEMS_SCHEMA = {
+    'Title': ('category', "Unknown Title"),
+    'Author': ('category', "Unknown Author"),
+    'ISBN Valid': ('float64', None),
+    'Publisher': ('category', None),
+    'Subjects': ('string', None),
+    'i': ('int32', None),
+    'Publication_Date': ('float32', None),
+    'Category': ('category', "Unknown"),
+}
+HISTORY_SCHEMA = {
+    'user_id': ('int32', None),
+    'books_borrowed': ('string', None),
+    'dates_borrowed': ('string', None),
+    'total_books': ('int32', None),
+}
+SUBMISSION_SCHEMA = {
+    'user_id': ('int32', None),
+    'recommendation': ('string', None),
+}
+
+TEXT_KINDS = ('category', 'string')
+
+
+def file_sha256(path):
+    """
+    Hex SHA-256 of a file, read in chunks.
+    """
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_BYTES), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def source_signature(path):
+    """
+    (size, mtime_ns) of the source file.
+    """
+    stat = os.stat(path)
+    return stat.st_size, stat.st_mtime_ns
+
+
+def cache_path(csv_path, cache_dir):
+    """
+    Cache directory of one CSV (named after its file name).
+    """
+    return os.path.join(cache_dir, os.path.splitext(os.path.basename(csv_path))[0])
+
+
+def _code_dtype(n_values):
+    # Smallest signed type holding every code and the -1 of missing values
+    return np.int16 if n_values < 2**15 else np.int32
+
+
+def _encode_strings(values):
+    """
+    (uint8 UTF-8 blob, int64 offsets) of a sequence of str.
+    """
+    encoded = [value.encode('utf-8') for value in values]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    np.cumsum([len(e) for e in encoded], out=offsets[1:])
+    return np.frombuffer(b''.join(encoded), dtype=np.uint8), offsets
+
+
+def _decode_strings(blob, offsets):
+    data = blob.tobytes()
+    return [data[start:end].decode('utf-8') for start, end in zip(offsets[:-1], offsets[1:])]
+
+
+def build_cache(csv_path, schema, target):
+    """
+    Parses csv_path with the schema's dtypes and writes its columnar cache
+    to target (replacing any previous one).
+    """
+    dtypes = {column: 'category' if kind in TEXT_KINDS else kind
+              for column, (kind, _) in schema.items()}
+    df = pd.read_csv(csv_path, dtype=dtypes, usecols=list(schema))
+
+    tmp = target + '.tmp'
+    shutil.rmtree(tmp, ignore_errors=True)
+    os.makedirs(tmp)
+    for index, (column, (kind, fill)) in enumerate(schema.items()):
+        stem = os.path.join(tmp, f"{index}")
+        values = df[column]
+        if kind in TEXT_KINDS:
+            if fill is not None and values.isna().any():
+                values = values.cat.add_categories([fill]).fillna(fill)
+            categories = [str(c) for c in values.cat.categories]
+            blob, offsets = _encode_strings(categories)
+            np.save(stem + '.codes.npy', values.cat.codes.to_numpy().astype(_code_dtype(len(categories))))
+            np.save(stem + '.blob.npy', blob)
+            np.save(stem + '.offsets.npy', offsets)
+        else:
+            np.save(stem + '.npy', values.to_numpy())
+
+    size, mtime_ns = source_signature(csv_path)
+    manifest = {'format': FORMAT_VERSION, 'source': os.path.abspath(csv_path), 'size': size,
+                'mtime_ns': mtime_ns, 'sha256': file_sha256(csv_path), 'rows': len(df),
+                'schema': {column: list(spec) for column, spec in schema.items()}}
+    with open(os.path.join(tmp, 'manifest.json'), 'w') as f:
+        json.dump(manifest, f, indent=2)
+
+    shutil.rmtree(target, ignore_errors=True)
+    os.replace(tmp, target)
+    return manifest
+
+
+def read_manifest(target):
+    try:
+        with open(os.path.join(target, 'manifest.json')) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def is_fresh(manifest, csv_path, schema):
+    """
+    Whether a cache manifest still matches the source file and schema.
+    Re-hashes the source only when its size or mtime changed, and records
+    the new mtime when the content turned out identical.
+    """
+    if manifest is None or manifest.get('format') != FORMAT_VERSION:
+        return False
+    if manifest['schema'] != {column: list(spec) for column, spec in schema.items()}:
+        return False
+    size, mtime_ns = source_signature(csv_path)
+    if (size, mtime_ns) == (manifest['size'], manifest['mtime_ns']):
+        return True
+    if size != manifest['size'] or file_sha256(csv_path) != manifest['sha256']:
+        return False
+    manifest['mtime_ns'] = mtime_ns
+    return True
+
+
+def read_cache(target, schema):
+    """
+    DataFrame of a columnar cache directory.
+    """
+    columns = {}
+    for index, (column, (kind, _)) in enumerate(schema.items()):
+        stem = os.path.join(target, f"{index}")
+        if kind in TEXT_KINDS:
+            codes = np.load(stem + '.codes.npy')
+            categories = _decode_strings(np.load(stem + '.blob.npy'), np.load(stem + '.offsets.npy'))
+            values = pd.Categorical.from_codes(codes, categories=categories)
+            if kind == 'string':
+                values = pd.Series(values).astype(str).where(codes >= 0)
+            columns[column] = values
+        else:
+            columns[column] = np.load(stem + '.npy')
+    return pd.DataFrame(columns)
+
+
+def load_table(csv_path, schema, cache_dir):
+    """
+    The CSV as a typed DataFrame, from its cache under cache_dir (built or
+    rebuilt first when missing or stale).
+    """
+    target = cache_path(csv_path, cache_dir)
+    manifest = read_manifest(target)
+    recorded_mtime = manifest and manifest.get('mtime_ns')
+    if is_fresh(manifest, csv_path, schema):
+        if manifest['mtime_ns'] != recorded_mtime:
+            # Touched but unchanged: remember the new mtime to skip hashing next time
+            with open(os.path.join(target, 'manifest.json'), 'w') as f:
+                json.dump(manifest, f, indent=2)
+    else:
+        os.makedirs(cache_dir, exist_ok=True)
+        build_cache(csv_path, schema, target)
+    return read_cache(target, schema)
+
+
+def split_lists(lists, sep):
+    """
+    (per-row token counts, flat list of tokens) of a column of sep-joined
+    lists; missing or empty lists count 0. One join and one split for the
+    whole column, no per-row Python. Tokens are returned as written, so a
+    doubled or trailing separator yields an empty one (see keep_tokens).
+    """
+    lists = lists.fillna('').str.strip()
+    non_empty = (lists != '').to_numpy()
+    counts = np.where(non_empty, lists.str.count(sep) + 1, 0)
+    if not non_empty.any():
+        return counts, []
+    joined = sep.join(lists[non_empty])
+    if sep != ' ':
+        # "0, 1, 2": tokens never contain spaces
+        joined = joined.replace(' ', '')
+    return counts, joined.split(sep)
+
+
+def keep_tokens(counts, tokens, keep):
+    """
+    (per-row counts, tokens) of split_lists() output restricted to the
+    tokens where the boolean array keep is True.
+    """
+    rows = np.repeat(np.arange(len(counts)), counts)
+    return np.bincount(rows[keep], minlength=len(counts)), np.asarray(tokens, dtype=object)[keep]
+
+
+def is_id(tokens):
+    # Item ids are the digit-only tokens; empty or stray ones are skipped
+    # like the per-row parsing did (x.strip().isdigit())
+    return np.char.isdigit(np.asarray(tokens, dtype=str))
+
+
+def explode_history(history_df):
+    """
+    Long-form borrows of the history table: one row per borrow, in user
+    then borrow order, with int32 user_id / item_id and a datetime date.
+    Tokens that are not item ids are skipped, with their date when both
+    lists have the same length.
+    """
+    counts, books = split_lists(history_df['books_borrowed'], ',')
+    date_counts, dates = split_lists(history_df['dates_borrowed'], ',')
+    if np.array_equal(counts, date_counts):
+        keep = is_id(books)
+        _, dates = keep_tokens(date_counts, dates, keep)
+        counts, books = keep_tokens(counts, books, keep)
+    else:
+        counts, books = keep_tokens(counts, books, is_id(books))
+        date_counts, dates = keep_tokens(date_counts, dates, np.asarray(dates, dtype=str) != '')
+        if not np.array_equal(counts, date_counts):
+            raise ValueError("books_borrowed and dates_borrowed lists have different lengths")
+    return pd.DataFrame({'user_id': np.repeat(history_df['user_id'].to_numpy().astype(np.int32), counts),
+                         'item_id': np.array(books, dtype=np.int32),
+                         'date': pd.to_datetime(dates, format='%d-%m-%Y')})
+
+
+def explode_recommendations(submissions_df):
+    """
+    Long-form recommendations of the submission table: one (user_id,
+    item_id, rank) row per recommended item, in user then rank order.
+    """
+    counts, items = split_lists(submissions_df['recommendation'], ' ')
+    counts, items = keep_tokens(counts, items, is_id(items))
+    starts = np.cumsum(counts) - counts
+    return pd.DataFrame({'user_id': np.repeat(submissions_df['user_id'].to_numpy().astype(np.int32), counts),
+                         'item_id': np.array(items, dtype=np.int32),
+                         'rank': (np.arange(counts.sum()) - np.repeat(starts, counts)).astype(np.int16)})
+
+
+def data_version(csv_paths, cache_dir):
+    """
+    Short hash of the source contents of the given cached CSVs (from their
+    manifests), to key caches of values derived from them.
+    """
+    digest = hashlib.sha256()
+    for csv_path in csv_paths:
+        manifest = read_manifest(cache_path(csv_path, cache_dir))
+        digest.update((manifest['sha256'] if manifest else csv_path).encode())
+    return digest.hexdigest()[:16]
@@ -1,37 +1,35 @@
-import pandas as pd
 import streamlit as st
 from .statistics import calculate_book_stats
+from .wire_format import wire_ids
 
 @st.cache_data
-def get_category_recommendations(history_df, items_df):
+def get_category_recommendations(borrows_df, items_df):
     """
     Pre-calculates top books for every category to be used in client-side JS recommender.
     Returns:
-        category_recs: Dict { "CategoryName": [ {Title, Author}, ... ] }
+        category_recs: Dict { "CategoryName": [ wire id, ... ] } (book positions in
+                       the item table, see wire_format)
         all_categories: List of sorted category names
     """
     # Reuse existing stats logic to get popularity
     # borrow_counts_df has columns: Title, Author, Main_Category, Borrow_Count
-    borrow_counts_df, _, _ = calculate_book_stats(history_df, items_df)
+    borrow_counts_df, _, _ = calculate_book_stats(borrows_df, items_df)
     
     # Filter only relevant columns to save space
     df = borrow_counts_df[['Title', 'Author', 'Main_Category', 'Borrow_Count']]
     
     # Group by Category and get Top 20 per category
     # (We only need top 10 max for the UI, but 20 gives variety if we add randomness later)
+    # One grouped pass instead of a full-frame filter per category:
+    # df is sorted by Borrow_Count and head() keeps that order per category
+    top_books = df.groupby('Main_Category', sort=False).head(20)
+
+    # Convert to lists of wire ids (categories in order of first appearance)
     category_recs = {}
-    
-    # Get list of unique categories
-    categories = df['Main_Category'].unique()
-    
-    for cat in categories:
-        # Get top books for this category
-        top_books = df[df['Main_Category'] == cat].head(20)
-        
-        # Convert to list of dicts
-        books_list = top_books[['Title', 'Author']].to_dict('records')
-        category_recs[cat] = books_list
-        
+    books = wire_ids(items_df, top_books.index).tolist()
+    for cat, book in zip(top_books['Main_Category'], books):
+        category_recs.setdefault(cat, []).append(book)
+
     all_categories = sorted(list(category_recs.keys()))
     
     return category_recs, all_categories
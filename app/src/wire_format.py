@@ -0,0 +1,98 @@
+"""
+Compact JSON wire format of the book data sent to the frontend.
+
+Books are sent once, in an item table, and referenced everywhere else by
+their position in it (the "wire id", 0 .. n_items - 1):
+
+- item table: {"titles": [...], "authors": [distinct authors],
+  "author_index": packed author position of every book},
+- user profile: {"history": [...], "recommendations": [...]} as
+  delta-encoded wire ids (first id, then differences: borrow ids are
+  mostly consecutive, so the numbers are short),
+- categories: {"names": [...], "offsets": packed, "items": packed}, the
+  wire ids of category k being items[offsets[k]:offsets[k + 1]].
+
+Large integer arrays are packed as little-endian typed arrays in base64
+({"dtype": "uint16" | "uint32", "data": ...}), decoded by the browser
+into a Uint16Array / Uint32Array without parsing one number at a time.
+"""
+
+import base64
+import json
+
+import numpy as np
+
+TYPED_DTYPES = {'uint16': '<u2', 'uint32': '<u4'}
+
+
+def pack_array(values):
+    """
+    Typed-array packing of non-negative integers (uint16 when they fit).
+    """
+    values = np.asarray(values, dtype=np.int64)
+    dtype = 'uint16' if len(values) == 0 or values.max() < 2**16 else 'uint32'
+    return {"dtype": dtype,
+            "data": base64.b64encode(values.astype(TYPED_DTYPES[dtype]).tobytes()).decode('ascii')}
+
+
+def unpack_array(packed):
+    """
+    Inverse of pack_array(), as an int64 array.
+    """
+    return np.frombuffer(base64.b64decode(packed["data"]), dtype=TYPED_DTYPES[packed["dtype"]]).astype(np.int64)
+
+
+def delta_encode(ids):
+    """
+    [ids[0], ids[1] - ids[0], ...] as a list of ints.
+    """
+    ids = np.asarray(ids, dtype=np.int64)
+    return np.diff(ids, prepend=0).tolist()
+
+
+def delta_decode(deltas):
+    return np.cumsum(np.asarray(deltas, dtype=np.int64))
+
+
+def item_table(items_df):
+    """
+    The item table of items_df (wire id = row position).
+    """
+    authors = items_df['Author'].astype(object)
+    author_codes, distinct_authors = authors.factorize()
+    return {"titles": items_df['Title'].astype(object).tolist(),
+            "authors": distinct_authors.tolist(),
+            "author_index": pack_array(author_codes)}
+
+
+def wire_ids(items_df, item_ids):
+    """
+    Wire ids of item ids ('i' values); -1 for items missing from items_df.
+    """
+    return items_df.set_index('i').index.get_indexer(item_ids)
+
+
+def user_profile(history, recommendations):
+    """
+    JSON profile of one user from the wire ids of its borrows and recommendations.
+    """
+    return dumps({"history": delta_encode(history), "recommendations": delta_encode(recommendations)})
+
+
+def category_table(category_ids):
+    """
+    Packed categories of {name: [wire ids, ...]} (in dict order).
+    """
+    names = list(category_ids)
+    lengths = [len(category_ids[name]) for name in names]
+    flat = np.concatenate([np.asarray(category_ids[name], dtype=np.int64) for name in names]) \
+        if names else np.empty(0, dtype=np.int64)
+    return {"names": names, "offsets": pack_array(np.concatenate([[0], np.cumsum(lengths)])),
+            "items": pack_array(flat)}
+
+
+def dumps(payload):
+    """
+    Compact JSON (no spaces, UTF-8 rather than \\u escapes) of a wire payload.
+    """
+    return json.dumps(payload, separators=(',', ':'), ensure_ascii=False)
@@ -1,15 +1,19 @@
+import time
 import pandas as pd
-from src.statistics import calculate_global_stats, calculate_user_stats, prepare_cluster_data
+from src.data_store import explode_history
+from src.statistics import calculate_global_stats, calculate_user_stats, prepare_cluster_data, calculate_book_stats
 
 # Load Data
 print("Loading data...")
 history = pd.read_csv('Books_Recommander_System-main/user_borrowing_history.csv')
 items = pd.read_csv('Books_Recommander_System-main/items_enriched.csv')
 submissions = pd.read_csv('submission.csv')
+borrows = explode_history(history)
+print(f"Borrow table: {len(borrows)} rows")
 
 # 1. Test Global Stats
 print("\nTesting Global Stats...")
-g_stats = calculate_global_stats(history, items, submissions)
+g_stats = calculate_global_stats(borrows, items, history['user_id'])
 print(f"Reborrow Rate: {g_stats['Reborrow Rate']:.2f}% (Expected ~26.47%)")
 assert abs(g_stats['Reborrow Rate'] - 26.47) < 0.1, "Reborrow Rate Mismatch!"
 
@@ -27,8 +31,22 @@ assert unique_cats <= 20, f"Too many categories! Found {unique_cats}"
 
 # 3. Test User Stats
 print("\nTesting User Stats...")
-u_stats = calculate_user_stats(history)
+u_stats = calculate_user_stats(borrows, history['user_id'])
 print(f"User Stats Rows: {len(u_stats)}")
 print(u_stats.head())
 
+# 4. Test Book Stats
+print("\nTesting Book Stats...")
+borrow_counts_df, top_books_df, top_categories_df = calculate_book_stats(borrows, items)
+assert borrow_counts_df['Borrow_Count'].sum() == g_stats['Total Borrows'], "Borrow Count Mismatch!"
+print(top_books_df.head(3))
+
+# 5. Time the whole Data Insights page
+start = time.perf_counter()
+calculate_global_stats(borrows, items, history['user_id'])
+calculate_user_stats(borrows, history['user_id'])
+prepare_cluster_data(items)
+calculate_book_stats(borrows, items)
+print(f"\nAll dashboard statistics: {(time.perf_counter() - start) * 1000:.0f} ms")
+
 print("\nALL TESTS PASSED!")
@@ -0,0 +1,83 @@
+"""
+Peak RSS and time of the thresholded Jaccard: full X_bin @ X_bin.T then
+threshold (raw_jaccard + threshold_similarity) vs blocked_jaccard with a
+few max_block_bytes budgets. Every run happens in a fresh process so the
+peaks do not mix.
+
+Run from the repository root:
+    python benchmarks/bench_blocked_jaccard.py [--users 30000]
+(--users 0 uses interactions.csv, other values synthetic users from
+bench_minhash.synthetic_borrows)
+"""
+
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import time
+
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, os.path.dirname(__file__))
+from recommender import matrices
+
+INTERACTIONS_PATH = os.path.join(os.path.dirname(__file__), '..', 'interactions.csv')
+SIM_THRESHOLD = 0.05
+BUDGETS_MB = [16, 64, 256]
+
+
+def load_x_bin(n_users):
+    if n_users == 0:
+        interactions = pd.read_csv(INTERACTIONS_PATH)
+        users, items = matrices.build_mappings(interactions)
+        rows, cols = matrices.encode(interactions, users, items)
+        return matrices.interaction_matrix(rows, cols, (len(users), len(items)))
+    from bench_minhash import synthetic_borrows
+    return synthetic_borrows(n_users)
+
+
+def peak_rss_mb():
+    # ru_maxrss is in KB on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def run_one(n_users, budget_mb):
+    X_bin = load_x_bin(n_users)
+    before = peak_rss_mb()
+    start = time.time()
+    if budget_mb is None:
+        sim = matrices.threshold_similarity(matrices.raw_jaccard(X_bin), SIM_THRESHOLD)
+    else:
+        sim = matrices.blocked_jaccard(X_bin, SIM_THRESHOLD, budget_mb * 2**20)
+    print(json.dumps({'time': time.time() - start, 'nnz': sim.nnz,
+                      'peak_mb': peak_rss_mb(), 'input_mb': before}))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--users', type=int, default=0)
+    parser.add_argument('--run', default=None, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run is not None:
+        run_one(args.users, None if args.run == 'full' else int(args.run))
+        return
+
+    print(f"Users: {'interactions.csv' if args.users == 0 else args.users}, threshold {SIM_THRESHOLD}")
+    print(f"  {'Approach':<16} {'Time':<8} {'Peak RSS':<12} {'After load':<12} {'Pairs':<10}")
+    for run in ['full'] + [str(mb) for mb in BUDGETS_MB]:
+        out = subprocess.run([sys.executable, __file__, '--users', str(args.users), '--run', run],
+                             capture_output=True, text=True)
+        if out.returncode != 0:
+            print(f"  {run:<16} failed (exit {out.returncode})")
+            continue
+        r = json.loads(out.stdout.strip().splitlines()[-1])
+        name = 'full product' if run == 'full' else f"blocked {run}MB"
+        print(f"  {name:<16} {r['time']:<8.2f} {r['peak_mb']:<8.0f} MB  {r['input_mb']:<8.0f} MB  {r['nnz']:<10}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""
+Incremental UserCFModel.update() vs a full fit().
+
+For several batch sizes, the model is fitted without a batch of
+interactions, then updated with it, and compared with a model fitted on
+everything (matrices and cached recommendations must match), for the
+default float64 model, a compact one and one with top_n pruning.
+Three kinds of batches:
+- random: borrows drawn from the whole period (the recency reference date
+  does not move, only the touched rows are rebuilt)
+- latest: the most recent borrows (the reference date moves, S_self is
+  recomputed from the log and every cached row is refreshed)
+- fixed: the same batches with a fixed reference_t (the end of the
+  period, like a daily job would set it): only the touched rows again
+
+Run from the repository root (exits 1 on any mismatch):
+    python benchmarks/bench_incremental_update.py
+"""
+
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+from recommender.model import UserCFModel
+
+INTERACTIONS_PATH = os.path.join(os.path.dirname(__file__), '..', 'interactions.csv')
+BATCH_SIZES = [10, 100, 1000, 10000]
+VARIANTS = {'float64': {}, 'compact': {'compact': True}, 'top_n=50': {'top_n': 50}}
+
+
+def same_matrix(a, b):
+    a, b = a.tocsr(), b.tocsr()
+    a.sort_indices()
+    b.sort_indices()
+    return (a.shape == b.shape
+            and np.array_equal(a.indptr, b.indptr)
+            and np.array_equal(a.indices, b.indices)
+            and np.array_equal(a.data, b.data))
+
+
+def check(updated, full):
+    """
+    Returns True when the updated model matches the full rebuild.
+    Recommendations are compared by score, since the order among equal
+    scores is not specified.
+    """
+    if not (np.array_equal(updated.users, full.users) and np.array_equal(updated.items, full.items)
+            and same_matrix(updated.S_self, full.S_self)
+            and same_matrix(updated.Sim_User, full.Sim_User)):
+        return False
+    w = full.w_history
+    scores = (full.S_self * w + (full.Sim_User @ full.S_self) * (1 - w)).tocsr()
+    rows = np.arange(len(full.users))[:, None]
+    updated_scores = np.asarray(scores[rows, updated.recs_cache].todense())
+    full_scores = np.asarray(scores[rows, full.recs_cache].todense())
+    return np.allclose(updated_scores, full_scores)
+
+
+def main():
+    interactions = pd.read_csv(INTERACTIONS_PATH)
+    rng = np.random.default_rng(42)
+
+    start = time.time()
+    UserCFModel().fit(interactions).cache_recommendations(k=10)
+    full_time = time.time() - start
+    print(f"Full fit + cache: {full_time:.2f}s")
+    print(f"  {'Model':<10} {'Batch':<8} {'Kind':<8} {'Update':<10} {'vs full':<10} {'Matches':<8}")
+
+    by_time = interactions.sort_values('t', kind='stable').index.to_numpy()
+    mismatches = 0
+    for batch_size in BATCH_SIZES:
+        latest = np.sort(by_time[-batch_size:])
+        batches = {
+            'random': (np.sort(rng.choice(len(interactions), batch_size, replace=False)), None),
+            'latest': (latest, None),
+            'fixed': (latest, interactions['t'].max()),
+        }
+        for variant, params in VARIANTS.items():
+            for kind, (batch, reference_t) in batches.items():
+                is_new = np.zeros(len(interactions), dtype=bool)
+                is_new[batch] = True
+                model = UserCFModel(**params, reference_t=reference_t).fit(interactions[~is_new])
+                model.cache_recommendations(k=10)
+
+                # Full rebuild on the log in the order the update sees it
+                reordered = pd.concat([interactions[~is_new], interactions[is_new]])
+                reference = UserCFModel(**params, reference_t=reference_t).fit(reordered)
+                reference.cache_recommendations(k=10)
+
+                start = time.time()
+                model.update(interactions[is_new])
+                update_time = time.time() - start
+                matches = check(model, reference)
+                mismatches += not matches
+                print(f"  {variant:<10} {batch_size:<8} {kind:<8} {update_time:<10.3f} "
+                      f"x{full_time / update_time:<9.1f} {matches}")
+
+    if mismatches:
+        print(f"\n✗ {mismatches} updates differ from a full fit")
+        sys.exit(1)
+    print("\n✓ Every update matches a full fit")
+
+if __name__ == "__main__":
+    main()
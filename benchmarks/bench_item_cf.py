@@ -0,0 +1,71 @@
+"""
+Scoring cost of item-item vs user-user CF as the number of users grows.
+
+On synthetic borrows (same generator as bench_minhash.py) both engines
+precompute their similarity once, then score the same random sample of
+users. User-user scoring walks the whole history of every neighbour, so
+its per-user cost grows with the user count; item-item scoring only
+touches history length x top_n entries.
+
+Run from the repository root:
+    python benchmarks/bench_item_cf.py [--users 10000 100000] [--sample 2000]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+from recommender import item_cf, matrices, scoring
+from bench_minhash import synthetic_borrows
+
+SIM_THRESHOLD = 0.05
+TOP_N = 50
+W_HISTORY = 0.9
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--users', type=int, nargs='+', default=[10_000, 30_000, 100_000])
+    parser.add_argument('--sample', type=int, default=2000)
+    args = parser.parse_args()
+
+    print(f"Scoring {args.sample} random users, user-user threshold {SIM_THRESHOLD}, "
+          f"item-item top {TOP_N}")
+    print(f"  {'Users':<9} {'Engine':<10} {'Precompute':<11} {'Sim nnz':<12} "
+          f"{'Score':<9} {'us/user':<9} {'Product nnz/user':<16}")
+    for n_users in args.users:
+        X_bin = synthetic_borrows(n_users)
+        # Synthetic borrows have no dates: every borrow weighs 1
+        S_self = X_bin.astype(np.float64)
+        rows = np.random.default_rng(0).choice(n_users, min(args.sample, n_users), replace=False)
+
+        start = time.time()
+        Sim_User = matrices.blocked_jaccard(X_bin, SIM_THRESHOLD)
+        user_time = time.time() - start
+        start = time.time()
+        Sim_Item = item_cf.item_similarity(X_bin, 'cosine', TOP_N)
+        item_time = time.time() - start
+
+        engines = [
+            ('user-user', user_time, Sim_User,
+             lambda: scoring.recommend_top_k(S_self, Sim_User, W_HISTORY, user_rows=rows),
+             lambda: (Sim_User[rows] @ S_self).nnz),
+            ('item-item', item_time, Sim_Item,
+             lambda: item_cf.recommend_top_k(S_self, Sim_Item, W_HISTORY, user_rows=rows),
+             lambda: (S_self[rows] @ Sim_Item).nnz),
+        ]
+        for name, precompute, sim, score, product_nnz in engines:
+            start = time.time()
+            score()
+            elapsed = time.time() - start
+            print(f"  {n_users:<9,} {name:<10} {precompute:<9.2f}s  {sim.nnz:<12,} "
+                  f"{elapsed:<7.2f}s  {elapsed / len(rows) * 1e6:<9.0f} "
+                  f"{product_nnz() / len(rows):<16,.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""
+MinHash-LSH Sim_User vs the exact Jaccard: pair recall and build time on
+synthetic users.
+
+Synthetic users borrow mostly from a small "community" pool of items
+(so real neighbours exist) and partly from a popularity-skewed catalog;
+the catalog has 2 items per user, like interactions.csv (7.8k users,
+15k items). The exact matrix is only built up to --max-exact users.
+
+"LSH est" (exact=False) values estimate the Jaccard of the users' item
+*sets* (binarized rows), a different quantity from the count-based
+Jaccard of Sim_User, where a reborrowed book counts more than once; only
+"LSH exact" (exact=True) values equal Sim_User's. Recall compares pairs
+found, not values, against the count-based exact matrix.
+
+Run from the repository root:
+    python benchmarks/bench_minhash.py [--users 10000 100000 1000000]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+from recommender import matrices, minhash
+
+SIM_THRESHOLD = 0.05
+COMMUNITY_USERS = 50
+COMMUNITY_ITEMS = 100
+LOCAL_SHARE = 0.7
+MEAN_BORROWS = 11
+
+
+def synthetic_borrows(n_users, seed=42):
+    """
+    X_bin of n_users synthetic users.
+    """
+    rng = np.random.default_rng(seed)
+    n_items = 2 * n_users
+    counts = np.maximum(1, rng.geometric(1 / MEAN_BORROWS, n_users))
+    rows = np.repeat(np.arange(n_users), counts)
+
+    community = rows // COMMUNITY_USERS
+    local = rng.random(len(rows)) < LOCAL_SHARE
+    local_items = (community * COMMUNITY_ITEMS + rng.integers(0, COMMUNITY_ITEMS, len(rows))) % n_items
+    # Popularity ~ 1 / (rank + 10), uncapped: the +10 flattens the head, so the
+    # top item gets ~1% of the catalog borrows at these sizes
+    popularity = 1.0 / (np.arange(n_items) + 10)
+    global_items = rng.choice(n_items, len(rows), p=popularity / popularity.sum())
+    cols = np.where(local, local_items, global_items)
+    return matrices.interaction_matrix(rows, cols, (n_users, n_items))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--users', type=int, nargs='+', default=[10_000, 100_000, 1_000_000])
+    parser.add_argument('--max-exact', type=int, default=30_000)
+    parser.add_argument('--bands', type=int, default=128)
+    parser.add_argument('--rows', type=int, default=1)
+    args = parser.parse_args()
+
+    print(f"Threshold {SIM_THRESHOLD}, {args.bands} bands x {args.rows} rows")
+    print(f"  {'Users':<10} {'Exact':<9} {'LSH est':<9} {'LSH exact':<10} "
+          f"{'Recall est':<11} {'Recall exact':<12}")
+    for n_users in args.users:
+        X_bin = synthetic_borrows(n_users)
+
+        exact, exact_time = None, float('nan')
+        if n_users <= args.max_exact:
+            start = time.time()
+            exact = matrices.threshold_similarity(matrices.raw_jaccard(X_bin), SIM_THRESHOLD)
+            exact_time = time.time() - start
+
+        start = time.time()
+        estimated = minhash.lsh_similarity(X_bin, SIM_THRESHOLD, n_hashes=args.bands * args.rows,
+                                           bands=args.bands, rows=args.rows, exact=False)
+        estimated_time = time.time() - start
+
+        start = time.time()
+        verified = minhash.lsh_similarity(X_bin, SIM_THRESHOLD, n_hashes=args.bands * args.rows,
+                                          bands=args.bands, rows=args.rows, exact=True)
+        verified_time = time.time() - start
+
+        if exact is not None:
+            recall_est = f"{minhash.pair_recall(estimated, exact):.3f}"
+            recall_exact = f"{minhash.pair_recall(verified, exact):.3f}"
+        else:
+            recall_est = recall_exact = '-'
+        print(f"  {n_users:<10} {exact_time:<9.2f} {estimated_time:<9.2f} {verified_time:<10.2f} "
+              f"{recall_est:<11} {recall_exact:<12}")
+
+
+if __name__ == "__main__":
+    main()
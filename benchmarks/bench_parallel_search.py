@@ -0,0 +1,81 @@
+"""
+Wall-clock scaling of the grid search with 1 / 2 / 4 / 8 workers
+(recommender.parallel.parallel_grid_search; 1 = serial grid_search).
+
+Run from the repository root:
+    python benchmarks/bench_parallel_search.py [--workers 1 2 4 8]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+from scipy.sparse import csr_matrix
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+from recommender import grid_search, matrices, parallel
+
+INTERACTIONS_PATH = os.path.join(os.path.dirname(__file__), '..', 'interactions.csv')
+ALPHAS = [0.3, 0.5, 0.7, 1.0]
+THRESHOLDS = [0.01, 0.05, 0.1]
+WEIGHTS = [0.3, 0.5, 0.7, 0.9]
+
+
+def temporal_holdout(interactions, users, items, ratio=0.8):
+    """
+    Last 20% of every user's borrows as a sparse (users x items) ground truth,
+    the rest as training data.
+    """
+    df = interactions.sort_values(['u', 't'])
+    rank = df.groupby('u').cumcount()
+    size = df.groupby('u')['u'].transform('size')
+    is_test = rank >= (size * ratio).astype(int)
+
+    test = df[is_test]
+    rows, cols = matrices.encode(test, users, items)
+    truth = csr_matrix((np.ones(len(rows)), (rows, cols)), shape=(len(users), len(items)))
+    truth.data[:] = 1
+    return df[~is_test], truth
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4, 8])
+    args = parser.parse_args()
+
+    interactions = pd.read_csv(INTERACTIONS_PATH)
+    users, items = matrices.build_mappings(interactions)
+    train_df, truth = temporal_holdout(interactions, users, items)
+    # Evaluate on 20% of the users, like the script's test split
+    eval_rows = np.flatnonzero(truth.getnnz(axis=1))
+    eval_rows = np.sort(np.random.default_rng(42).choice(eval_rows, len(eval_rows) // 5, replace=False))
+    truth_coo = truth[eval_rows].tocoo()
+    n_items = len(items)
+    truth_keys = truth_coo.row.astype(np.int64) * n_items + truth_coo.col
+
+    def hit_rate(top_indices):
+        keys = np.arange(len(eval_rows))[:, None] * n_items + top_indices
+        return float(np.isin(keys, truth_keys).any(axis=1).mean())
+
+    print(f"CPUs available: {os.cpu_count()}")
+    print(f"  {'Workers':<10} {'Wall time':<12} {'Speedup':<10}")
+    baseline = None
+    for workers in args.workers:
+        start = time.time()
+        if workers == 1:
+            grid_search.grid_search(train_df, users, items, eval_rows, hit_rate,
+                                    ALPHAS, THRESHOLDS, WEIGHTS, verbose=False)
+        else:
+            parallel.parallel_grid_search(train_df, users, items, eval_rows, hit_rate,
+                                          ALPHAS, THRESHOLDS, WEIGHTS,
+                                          workers=workers, verbose=False)
+        wall = time.time() - start
+        baseline = baseline or wall
+        print(f"  {workers:<10} {wall:<12.2f} x{baseline / wall:.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+"""
+Checks the compact (float32 / uint8 values, int32 indices) matrices
+against the float64 defaults on the script's split: per-matrix memory
+report for both, measured reduction, and MAP@10 equal within
+MAP_TOLERANCE. Exits with status 1 if MAP@10 moved more than that.
+
+Run from the repository root:
+    python benchmarks/check_compact.py
+"""
+
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+from recommender import evaluation, matrices, split
+from recommender.model import UserCFModel
+
+INTERACTIONS_PATH = os.path.join(os.path.dirname(__file__), '..', 'interactions.csv')
+PARAMS = {'alpha': 0.7, 'sim_threshold': 0.05, 'w_history': 0.9}
+MAP_TOLERANCE = 1e-3
+
+
+def main():
+    interactions = pd.read_csv(INTERACTIONS_PATH)
+    _, items = matrices.build_mappings(interactions)
+    train_df, test_df = split.per_user_split(interactions)
+    eval_users = np.array(sorted(test_df['u'].unique()))
+    truth = evaluation.ground_truth(np.searchsorted(eval_users, test_df['u']),
+                                    np.searchsorted(items, test_df['i']),
+                                    (len(eval_users), len(items)))
+
+    scores, totals = {}, {}
+    for compact in (False, True):
+        model = UserCFModel(**PARAMS, compact=compact).fit(train_df)
+        print(f"\ncompact={compact}")
+        report = matrices.print_memory_report(model.named_matrices())
+        totals[compact] = sum(row['bytes'] for row in report)
+        recs = np.searchsorted(items, model.recommend(eval_users, k=10))
+        scores[compact] = evaluation.evaluate(recs, truth, k=10)['MAP@10']
+
+    diff = abs(scores[True] - scores[False])
+    print(f"\nMAP@10 float64 {scores[False]:.5f}, compact {scores[True]:.5f} (diff {diff:.2e})")
+    print(f"Memory {totals[False] / 2**20:.1f} MB -> {totals[True] / 2**20:.1f} MB "
+          f"({1 - totals[True] / totals[False]:.0%} less)")
+    if diff > MAP_TOLERANCE:
+        print(f"✗ MAP@10 moved by more than {MAP_TOLERANCE}")
+        sys.exit(1)
+    print(f"✓ MAP@10 unchanged within {MAP_TOLERANCE}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""
+Checks that cached_per_user_split never applies a cached split to other
+rows: the same frame hits the cache and gets the same split, while a
+row-permuted copy (same rows, different order / labels) and a relabelled
+copy get another fingerprint and therefore a fresh, correct split.
+Exits with status 1 on failure.
+
+Run from the repository root:
+    python benchmarks/check_split_cache.py
+"""
+
+import os
+import sys
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+from recommender import split
+
+INTERACTIONS_PATH = os.path.join(os.path.dirname(__file__), '..', 'interactions.csv')
+
+
+def same_split(a, b):
+    """
+    Whether two (train_df, test_df) pairs hold the same (u, i, t) rows.
+    """
+    def rows(df):
+        return df[['u', 'i', 't']].sort_values(['u', 't', 'i']).to_numpy()
+    return all(np.array_equal(rows(x), rows(y)) for x, y in zip(a, b))
+
+
+def main():
+    interactions = pd.read_csv(INTERACTIONS_PATH)
+    permuted = interactions.sample(frac=1.0, random_state=0)
+    relabelled = permuted.reset_index(drop=True)
+    failures = []
+
+    with tempfile.TemporaryDirectory() as cache_dir:
+        first = split.cached_per_user_split(interactions, cache_dir)
+        again = split.cached_per_user_split(interactions, cache_dir)
+        if len(os.listdir(cache_dir)) != 1 or not same_split(first, again):
+            failures.append("same frame: cache not reused or split changed")
+
+        for name, frame in (('permuted', permuted), ('relabelled', relabelled)):
+            if split.dataset_fingerprint(frame) == split.dataset_fingerprint(interactions):
+                failures.append(f"{name}: same fingerprint as the original")
+            cached = split.cached_per_user_split(frame, cache_dir)
+            if not same_split(cached, split.per_user_split(frame)):
+                failures.append(f"{name}: cached split differs from a fresh one")
+        print(f"  {len(os.listdir(cache_dir))} cache files for 3 orderings")
+
+    for failure in failures:
+        print(f"  ✗ {failure}")
+    if failures:
+        sys.exit(1)
+    print("✓ Split cache is keyed by row order and labels")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""
+User-based CF vs ALS vs item-item CF on the script's split: MAP@10 (and the other
+evaluation metrics), training time, peak training memory (tracemalloc)
+and model size.
+
+Run from the repository root:
+    python benchmarks/compare_engines.py
+"""
+
+import os
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+from recommender import evaluation, matrices, split
+from recommender.als import ALSModel
+from recommender.item_cf import ItemCFModel
+from recommender.model import UserCFModel
+
+INTERACTIONS_PATH = os.path.join(os.path.dirname(__file__), '..', 'interactions.csv')
+
+
+def main():
+    interactions = pd.read_csv(INTERACTIONS_PATH)
+    _, items = matrices.build_mappings(interactions)
+    train_df, test_df = split.per_user_split(interactions)
+    eval_users = np.array(sorted(test_df['u'].unique()))
+    truth = evaluation.ground_truth(np.searchsorted(eval_users, test_df['u']),
+                                    np.searchsorted(items, test_df['i']),
+                                    (len(eval_users), len(items)))
+
+    engines = {
+        'UserCF': (UserCFModel(alpha=0.7, sim_threshold=0.05, w_history=0.9),
+                   lambda m: matrices.total_nbytes(m.S_self, m.Sim_User)),
+        'ALS': (ALSModel(), lambda m: m.nbytes()),
+        'ItemCF': (ItemCFModel(), lambda m: m.nbytes()),
+    }
+    print(f"  {'Engine':<8} {'MAP@10':<8} {'Recall':<8} {'NDCG':<8} {'Train':<8} "
+          f"{'Peak mem':<10} {'Model':<10} {'Score all':<10}")
+    for name, (model, model_bytes) in engines.items():
+        tracemalloc.start()
+        start = time.time()
+        model.fit(train_df)
+        train_time = time.time() - start
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        start = time.time()
+        recs = np.searchsorted(items, model.recommend(eval_users, k=10))
+        score_time = time.time() - start
+        metrics = evaluation.evaluate(recs, truth, k=10)
+        print(f"  {name:<8} {metrics['MAP@10']:<8.4f} {metrics['Recall@10']:<8.4f} "
+              f"{metrics['NDCG@10']:<8.4f} {train_time:<8.2f} {peak / 2**20:<7.1f} MB "
+              f"{model_bytes(model) / 2**20:<7.1f} MB {score_time:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
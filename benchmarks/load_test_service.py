@@ -0,0 +1,100 @@
+"""
+Load test of the recommendation service (recommender/service.py).
+
+Starts the service in-process on a free port (or targets --url), then
+fires requests from --clients concurrent threads and reports p50 / p99
+latency and requests/sec for:
+- GET /recommend/{user_id} on a cold cache (every user once),
+- GET /recommend/{user_id} on the warm cache (same users again),
+- POST /recommend with --batch users per request.
+
+Run from the repository root, after "Recommender 1.1.py" saved model/:
+    python benchmarks/load_test_service.py [--model model] [--requests 5000] [--clients 8]
+"""
+
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+from recommender import service
+
+
+def get(url):
+    with urllib.request.urlopen(url) as response:
+        return json.loads(response.read())
+
+
+def post(url, payload):
+    request = urllib.request.Request(url, data=json.dumps(payload).encode(),
+                                     headers={'Content-Type': 'application/json'})
+    with urllib.request.urlopen(request) as response:
+        return json.loads(response.read())
+
+
+def run(name, calls, clients):
+    """
+    Runs every call (a no-argument function) over `clients` threads and
+    prints latency percentiles and throughput.
+    """
+    def timed(call):
+        start = time.perf_counter()
+        call()
+        return time.perf_counter() - start
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=clients) as pool:
+        latencies = np.array(list(pool.map(timed, calls)))
+    elapsed = time.perf_counter() - start
+    print(f"  {name:<22} {len(calls):<9,} {np.percentile(latencies, 50) * 1000:<9.2f} "
+          f"{np.percentile(latencies, 99) * 1000:<9.2f} {len(calls) / elapsed:<10,.0f}")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--model', default='model', help="saved model directory")
+    parser.add_argument('--url', default=None, help="running service to test instead")
+    parser.add_argument('--requests', type=int, default=5000)
+    parser.add_argument('--clients', type=int, default=8)
+    parser.add_argument('--batch', type=int, default=100)
+    args = parser.parse_args()
+
+    server = None
+    if args.url is None:
+        server, svc = service.make_server(args.model, port=0)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        url = f"http://127.0.0.1:{server.server_address[1]}"
+        users = np.asarray(svc.model.users)
+    else:
+        url = args.url.rstrip('/')
+        users = np.arange(args.requests)
+
+    rng = np.random.default_rng(0)
+    sample = rng.choice(users, min(args.requests, len(users)), replace=False).tolist()
+    batches = [rng.choice(users, args.batch).tolist() for _ in range(max(1, args.requests // args.batch))]
+
+    print(f"{url}, {args.clients} clients")
+    print(f"  {'Scenario':<22} {'Requests':<9} {'p50 ms':<9} {'p99 ms':<9} {'req/s':<10}")
+    try:
+        run('GET cold cache', [lambda u=u: get(f"{url}/recommend/{u}?k=10") for u in sample], args.clients)
+        run('GET warm cache', [lambda u=u: get(f"{url}/recommend/{u}?k=10") for u in sample], args.clients)
+        post(f"{url}/reload", {})
+        run(f'POST batch of {args.batch}',
+            [lambda b=b: post(f"{url}/recommend", {'user_ids': b, 'k': 10}) for b in batches],
+            args.clients)
+        print(f"  cache: {get(f'{url}/health')['cache']}")
+    finally:
+        if server is not None:
+            server.shutdown()
+            server.server_close()
+
+
+if __name__ == "__main__":
+    main()
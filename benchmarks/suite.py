@@ -0,0 +1,245 @@
+"""
+Benchmark suite for the recommender pipeline, stage by stage.
+
+Each stage (loading, mapping, split, build_matrices, per-user scoring,
+MAP evaluation, submission writing) is registered with @stage(name,
+variant); a variant is an alternative path for the same stage (e.g. the
+compact matrices or the item-item scorer), so new fast paths are timed
+next to the current one by registering one more function. A stage
+function does its untimed setup, then returns the zero-argument callable
+that is timed (best of --repeat runs); the result of the 'default'
+variant is kept in the context for the following stages.
+
+Datasets are interactions.csv ('real') and synthetic data `scale` times
+larger (recommender/synthetic.py), written to a temporary CSV so loading
+is timed too. Results are saved as JSON under benchmarks/results/, named
+after the date and commit, and two result files can be compared:
+
+    python benchmarks/suite.py [--scales real 10] [--repeat 3] [--stages build_matrices score]
+    python benchmarks/suite.py --compare benchmarks/results/A.json benchmarks/results/B.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+import scipy
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+from recommender import evaluation, item_cf, matrices, scoring, split, synthetic
+
+ROOT = os.path.join(os.path.dirname(__file__), '..')
+INTERACTIONS_PATH = os.path.join(ROOT, 'interactions.csv')
+RESULTS_DIR = os.path.join(os.path.dirname(__file__), 'results')
+ALPHA = 0.7
+SIM_THRESHOLD = 0.05
+W_HISTORY = 0.9
+REGRESSION_RATIO = 1.2
+# Differences below this are timer noise, never flagged
+NOISE_SECONDS = 0.01
+
+STAGES = []
+
+
+def stage(name, variant='default'):
+    """
+    Registers a stage function; stages run in registration order.
+    """
+    def register(fn):
+        STAGES.append((name, variant, fn))
+        return fn
+    return register
+
+
+@stage('load')
+def load(ctx):
+    return lambda: pd.read_csv(ctx['path'])
+
+
+@stage('mapping')
+def mapping(ctx):
+    def run():
+        users, items = matrices.build_mappings(ctx['load'])
+        return users, items, matrices.encode(ctx['load'], users, items)
+    return run
+
+
+@stage('split')
+def per_user_split(ctx):
+    return lambda: split.per_user_split(ctx['load'])
+
+
+@stage('build_matrices')
+def build_matrices(ctx):
+    train_df, _ = ctx['split']
+    users, items, _ = ctx['mapping']
+    return lambda: matrices.build_matrices(train_df, ALPHA, SIM_THRESHOLD, users, items)
+
+
+@stage('build_matrices', 'compact')
+def build_matrices_compact(ctx):
+    train_df, _ = ctx['split']
+    users, items, _ = ctx['mapping']
+    return lambda: matrices.build_matrices(train_df, ALPHA, SIM_THRESHOLD, users, items,
+                                           compact=True)
+
+
+def eval_rows(ctx):
+    _, test_df = ctx['split']
+    users, _, _ = ctx['mapping']
+    return np.searchsorted(users, np.sort(test_df['u'].unique()))
+
+
+@stage('score')
+def score_user_cf(ctx):
+    S_self, Sim_User = ctx['build_matrices']
+    rows = eval_rows(ctx)
+    return lambda: scoring.recommend_top_k(S_self, Sim_User, W_HISTORY, k=10, user_rows=rows)
+
+
+@stage('score', 'item_cf')
+def score_item_cf(ctx):
+    # Item similarity is precomputed once per model, only scoring is timed
+    train_df, _ = ctx['split']
+    users, items, _ = ctx['mapping']
+    rows, cols = matrices.encode(train_df, users, items)
+    X_bin = matrices.interaction_matrix(rows, cols, (len(users), len(items)))
+    Sim_Item = item_cf.item_similarity(X_bin)
+    S_self, _ = ctx['build_matrices']
+    user_rows = eval_rows(ctx)
+    return lambda: item_cf.recommend_top_k(S_self, Sim_Item, W_HISTORY, k=10, user_rows=user_rows)
+
+
+@stage('evaluate')
+def evaluate(ctx):
+    _, test_df = ctx['split']
+    users, items, _ = ctx['mapping']
+    eval_users = np.sort(test_df['u'].unique())
+    truth = evaluation.ground_truth(np.searchsorted(eval_users, test_df['u']),
+                                    np.searchsorted(items, test_df['i']),
+                                    (len(eval_users), len(items)))
+    return lambda: evaluation.evaluate(ctx['score'], truth, k=10)
+
+
+@stage('submission')
+def submission(ctx):
+    # Same formatting as the end of "Recommender 1.1.py", for every user
+    S_self, Sim_User = ctx['build_matrices']
+    users, items, _ = ctx['mapping']
+    top_items = items[scoring.recommend_top_k(S_self, Sim_User, W_HISTORY, k=10)]
+    path = os.path.join(ctx['tmp_dir'], 'submission.csv')
+
+    def run():
+        recommendations = [{'user_id': user, 'recommendation': ' '.join(map(str, recs))}
+                           for user, recs in zip(users, top_items)]
+        pd.DataFrame(recommendations).to_csv(path, index=False)
+    return run
+
+
+def time_call(fn, repeat):
+    """
+    (result of the last call, list of wall times in seconds).
+    """
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        times.append(time.perf_counter() - start)
+    return result, times
+
+
+def run_scale(scale, repeat, selected, tmp_dir):
+    """
+    {stage[variant]: timings} for one dataset scale.
+    """
+    ctx = {'tmp_dir': tmp_dir}
+    if scale == 'real':
+        ctx['path'] = INTERACTIONS_PATH
+    else:
+        ctx['path'] = os.path.join(tmp_dir, f"interactions_x{scale}.csv")
+        profile = synthetic.fit_profile(pd.read_csv(INTERACTIONS_PATH))
+        synthetic.write_csv(profile, float(scale), ctx['path'])
+
+    results = {}
+    for name, variant, fn in STAGES:
+        key = name if variant == 'default' else f"{name}[{variant}]"
+        # Default variants always run: later stages need their results
+        if variant != 'default' and selected and name not in selected:
+            continue
+        result, times = time_call(fn(ctx), repeat)
+        if variant == 'default':
+            ctx[name] = result
+        results[key] = {'min': min(times), 'mean': float(np.mean(times)), 'repeat': repeat}
+        print(f"  {str(scale):<6} {key:<26} {min(times):>9.3f}s")
+    return {'rows': len(ctx['load']), 'stages': results}
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+
+
+def compare(old_path, new_path):
+    """
+    Prints new / old min time of every stage present in both files.
+    """
+    with open(old_path) as f:
+        old = json.load(f)
+    with open(new_path) as f:
+        new = json.load(f)
+    print(f"{old['commit']} -> {new['commit']}")
+    print(f"  {'Scale':<6} {'Stage':<26} {'Old':>9} {'New':>9} {'Ratio':>7}")
+    for scale, result in new['scales'].items():
+        for key, timing in result['stages'].items():
+            if key not in old['scales'].get(scale, {}).get('stages', {}):
+                continue
+            before = old['scales'][scale]['stages'][key]['min']
+            ratio = timing['min'] / before
+            slower = ratio > REGRESSION_RATIO and timing['min'] - before > NOISE_SECONDS
+            flag = '  ✗ slower' if slower else ''
+            print(f"  {scale:<6} {key:<26} {before:>8.3f}s {timing['min']:>8.3f}s {ratio:>6.2f}x{flag}")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--scales', nargs='+', default=['real', '10'],
+                        help="'real' for interactions.csv or a synthetic scale factor")
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--stages', nargs='+', default=None,
+                        help="only run the variants of these stages (defaults always run)")
+    parser.add_argument('--out', default=None, help="result file (default: results/<date>_<commit>.json)")
+    parser.add_argument('--compare', nargs=2, metavar=('OLD', 'NEW'))
+    args = parser.parse_args()
+
+    if args.compare:
+        compare(*args.compare)
+        return
+
+    commit = git_commit()
+    report = {'commit': commit, 'date': datetime.now().isoformat(timespec='seconds'),
+              'python': platform.python_version(), 'numpy': np.__version__,
+              'scipy': scipy.__version__, 'pandas': pd.__version__, 'scales': {}}
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for scale in args.scales:
+            report['scales'][scale] = run_scale(scale, args.repeat, args.stages, tmp_dir)
+
+    out = args.out or os.path.join(RESULTS_DIR, f"{datetime.now():%Y%m%d-%H%M%S}_{commit}.json")
+    os.makedirs(os.path.dirname(out) or '.', exist_ok=True)
+    with open(out, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"✓ Saved to {out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,4 @@
+"""
+Reusable building blocks for the user-based CF recommender
+(see "Recommender 1.1.py" for the end-to-end script).
+"""
@@ -0,0 +1,70 @@
+"""
+Vectorized ranking metrics.
+
+All metrics are computed in one pass from
+- recs: (n_users, k) int array of recommended item columns, best first
+- truth: sparse (n_users, n_items) ground truth, row r belongs to recs[r]
+
+Users with no relevant item are left out of the averages, like the
+original MAP@10 loop which skipped users without a test set.
+"""
+
+import numpy as np
+from scipy.sparse import csr_matrix
+
+
+def ground_truth(rows, cols, shape):
+    """
+    Binary sparse ground truth from (row, item column) pairs.
+    Repeated pairs (reborrows) count once.
+    """
+    truth = csr_matrix((np.ones(len(rows)), (rows, cols)), shape=shape)
+    truth.data[:] = 1
+    return truth
+
+
+def hit_matrix(recs, truth):
+    """
+    (n_users, k) bool array: recs[r, j] is in the ground truth of row r.
+    """
+    n_items = truth.shape[1]
+    truth = truth.tocoo()
+    truth_keys = truth.row.astype(np.int64) * n_items + truth.col
+    rec_keys = np.arange(recs.shape[0], dtype=np.int64)[:, None] * n_items + recs
+    return np.isin(rec_keys, truth_keys)
+
+
+def evaluate(recs, truth, k=None):
+    """
+    Returns {'MAP@K', 'Recall@K', 'NDCG@K', 'HitRate@K', 'Coverage@K'}.
+    Coverage is the share of the catalog (truth columns) recommended to
+    at least one evaluated user.
+    """
+    recs = np.asarray(recs)
+    k = k or recs.shape[1]
+    recs = recs[:, :k]
+
+    n_relevant = np.diff(truth.tocsr().indptr)
+    evaluated = n_relevant > 0
+    hits = hit_matrix(recs, truth)[evaluated]
+    n_relevant = n_relevant[evaluated]
+
+    ranks = np.arange(1, k + 1)
+    discounts = 1.0 / np.log2(ranks + 1)
+
+    # MAP@K: precision at every hit, normalised by min(|relevant|, K)
+    precision_at_hits = np.cumsum(hits, axis=1) / ranks * hits
+    ap = precision_at_hits.sum(axis=1) / np.minimum(n_relevant, k)
+
+    # NDCG@K: the ideal ranking puts min(|relevant|, K) hits first
+    dcg = (hits * discounts).sum(axis=1)
+    ideal_dcg = np.cumsum(discounts)[np.minimum(n_relevant, k) - 1]
+
+    n_hits = hits.sum(axis=1)
+    return {
+        f'MAP@{k}': float(ap.mean()),
+        f'Recall@{k}': float((n_hits / n_relevant).mean()),
+        f'NDCG@{k}': float((dcg / ideal_dcg).mean()),
+        f'HitRate@{k}': float((n_hits > 0).mean()),
+        f'Coverage@{k}': len(np.unique(recs[evaluated])) / truth.shape[1],
+    }
@@ -0,0 +1,185 @@
+"""
+Grid search over (alpha, sim_threshold, top_n, w) for the user-based CF model.
+
+Only the recency weights depend on alpha, and the threshold / top_n only
+filter the Jaccard values, so:
+- X_bin and the raw Jaccard (above the smallest threshold) are built once
+  for the whole grid,
+- each (threshold, top_n) is a mask over the raw Jaccard, done once,
+- S_self is rebuilt once per alpha,
+- the history / collaborative blocks of the evaluated users are built once
+  per (alpha, threshold, top_n) and the w sweep is just a linear blend.
+
+top_n=None keeps every neighbour above the threshold. Each result records
+the mean number of neighbours per user and the time of the collaborative
+product, to weigh accuracy against scoring latency. compact=True builds
+every matrix with float32 values and int32 indices (matrices.compact_csr).
+"""
+
+import time
+
+from . import instrument, matrices, scoring
+from .results_store import params_key
+
+
+def similarity_grid(raw_sim, thresholds, top_ns):
+    """
+    {(threshold, top_n): Sim_User} for every combination.
+    """
+    sims = {}
+    for thresh in thresholds:
+        thresholded = matrices.threshold_similarity(raw_sim, thresh)
+        for top_n in top_ns:
+            sims[(thresh, top_n)] = matrices.top_n_neighbors(thresholded, top_n)
+    return sims
+
+
+def grid_search(train_df, users, items, eval_rows, score_fn, alphas, thresholds, weights, k=10,
+                metric=None, top_ns=(None,), compact=False, store=None, context=None, verbose=True):
+    """
+    Evaluates every (alpha, threshold, top_n, w) combination.
+
+    eval_rows are the user rows to recommend for, score_fn maps the
+    (len(eval_rows), k) top-k column array to a score (higher is better),
+    or to a dict of metrics (e.g. evaluation.evaluate) in which case
+    `metric` names the one to rank by.
+    With a results_store.ResultStore and its run context, configs already
+    stored are not evaluated again (their results come back with
+    cached=True) and new ones are recorded.
+    Returns the list of result dicts, in grid order.
+    """
+    shape = (len(users), len(items))
+    rows, cols = matrices.encode(train_df, users, items)
+    cells = [(alpha, thresh, top_n) for alpha in alphas for thresh in thresholds for top_n in top_ns]
+    cached = stored_results(store, context, cells, weights, compact, k, metric)
+    missing = [cell for cell in cells if any(cell + (w,) not in cached for w in weights)]
+    if verbose and store is not None:
+        print(f"  {len(cached)} configs already evaluated, {len(missing)} cells to compute")
+
+    sims = {}
+    if missing:
+        start_build = time.time()
+        with instrument.span('grid_build') as build:
+            X_bin = matrices.interaction_matrix(rows, cols, shape, compact)
+            # Pairs at or below the smallest threshold are never used
+            needed_thresholds = sorted({thresh for _, thresh, _ in missing})
+            raw_sim = matrices.blocked_jaccard(X_bin, min(needed_thresholds), compact=compact)
+            sims = similarity_grid(raw_sim, needed_thresholds, top_ns)
+            build.set(**instrument.nnz(X_bin=X_bin, raw_sim=raw_sim))
+        if verbose:
+            print(f"  Raw Jaccard + {len(sims)} similarity masks built in {time.time() - start_build:.1f}s")
+            matrices.print_memory_report({'X_bin': X_bin, 'Raw Sim': raw_sim})
+    if verbose:
+        print_header()
+
+    results = []
+    for alpha in alphas:
+        S_self = None
+        for thresh in thresholds:
+            for top_n in top_ns:
+                cell_key = (alpha, thresh, top_n)
+                if cell_key not in missing:
+                    cell_results = [cached[cell_key + (w,)] for w in weights]
+                else:
+                    if S_self is None:
+                        with instrument.span('recency_matrix', alpha=alpha) as recency:
+                            S_self = matrices.recency_matrix(train_df, rows, cols, alpha, shape,
+                                                             compact=compact)
+                            recency.set(**instrument.nnz(S_self=S_self))
+                    cell_results = evaluate_cell(S_self, sims[(thresh, top_n)], cell_key, eval_rows,
+                                                 score_fn, weights, k, metric, cached)
+                    for result in cell_results:
+                        if store is not None and not result.get('cached'):
+                            store.put(context, config_params(result, compact, k, metric), result)
+                for result in cell_results:
+                    results.append(result)
+                    if verbose:
+                        print_result(result)
+    return results
+
+
+def evaluate_cell(S_self, Sim_User, cell_key, eval_rows, score_fn, weights, k, metric, cached=None):
+    """
+    Result dicts of one (alpha, threshold, top_n) cell for every w; the
+    weights found in `cached` are returned as they are.
+    """
+    alpha, thresh, top_n = cell_key
+    cached = cached or {}
+    with instrument.span('grid_cell', alpha=alpha, thresh=thresh, top_n=top_n) as span:
+        start_collab = time.time()
+        history, collab = scoring.score_components(S_self, Sim_User, eval_rows)
+        cell = {'alpha': alpha, 'thresh': thresh, 'top_n': top_n,
+                'neighbors': Sim_User.nnz / Sim_User.shape[0],
+                'collab_time': time.time() - start_collab}
+        span.set(**instrument.nnz(Sim_User=Sim_User, collab=collab))
+        results = []
+        for w in weights:
+            if cell_key + (w,) in cached:
+                results.append(cached[cell_key + (w,)])
+                continue
+            start_eval = time.time()
+            top_indices = scoring.recommend_from_components(history, collab, w, k=k)
+            results.append(cell_result(cell, w, score_fn(top_indices), metric,
+                                       time.time() - start_eval))
+        span.set(best_score=max(r['score'] for r in results))
+    return results
+
+
+def config_params(result, compact, k, metric):
+    """
+    Hyperparameters identifying a grid result in a ResultStore.
+    """
+    return {'alpha': result['alpha'], 'thresh': result['thresh'], 'top_n': result['top_n'],
+            'w': result['w'], 'compact': compact, 'k': k, 'metric': metric}
+
+
+def stored_results(store, context, cells, weights, compact, k, metric):
+    """
+    {(alpha, thresh, top_n, w): result} of the grid configs already in store.
+    """
+    if store is None:
+        return {}
+    wanted = {}
+    for alpha, thresh, top_n in cells:
+        for w in weights:
+            params = {'alpha': alpha, 'thresh': thresh, 'top_n': top_n, 'w': w}
+            wanted[(alpha, thresh, top_n, w)] = config_params(params, compact, k, metric)
+    found = store.lookup(context, list(wanted.values()))
+    return {key: found[params_key(params)] for key, params in wanted.items()
+            if params_key(params) in found}
+
+
+def cell_result(cell, w, value, metric, eval_time):
+    """
+    Result dict of one grid cell; dict values from score_fn are kept
+    under 'metrics'.
+    """
+    result = dict(cell, w=w)
+    if isinstance(value, dict):
+        result['score'] = value[metric]
+        result['metrics'] = value
+    else:
+        result['score'] = value
+    result['time'] = eval_time
+    return result
+
+
+def print_header():
+    print(f"  {'Alpha':<8} {'Thresh':<8} {'TopN':<6} {'Weight':<8} {'Score':<9} "
+          f"{'Nbrs':<8} {'Collab ms':<10} {'Time':<6}")
+    print("-" * 74)
+
+
+def print_result(result):
+    top_n = '-' if result['top_n'] is None else result['top_n']
+    eval_time = 'cached' if result.get('cached') else f"{result['time']:.1f}s"
+    print(f"  {result['alpha']:<8} {result['thresh']:<8} {top_n:<6} {result['w']:<8} "
+          f"{result['score']:.5f}   {result['neighbors']:<8.1f} "
+          f"{result['collab_time'] * 1000:<10.1f} {eval_time}")
+
+
+def best_result(results):
+    """
+    Result dict with the highest score.
+    """
+    return max(results, key=lambda r: r['score'])
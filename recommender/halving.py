@@ -0,0 +1,172 @@
+"""
+Successive-halving hyperparameter search on user subsamples.
+
+Instead of scoring every (alpha, threshold, top_n, w) config on all test
+users, every config is scored on a small stratified sample of them, the
+best 1 / eta are kept, and the survivors are scored again on a sample eta
+times larger, until the survivors are scored on every test user.
+
+The search space maps each parameter to either a list of values (a grid
+dimension) or a (low, high) tuple (a continuous range, sampled
+uniformly):
+
+    space = {'alpha': (0.3, 1.0), 'thresh': (0.01, 0.1),
+             'top_n': [None, 50, 10], 'w': (0.3, 0.95)}
+    configs = sample_configs(space, n_configs=81)
+    rounds = successive_halving(train_df, users, items, eval_rows, truth, configs)
+
+Samples are nested prefixes of one stratified order of the test users
+(strata = quantiles of their training activity), so a larger round only
+adds users. The raw Jaccard is built once above the smallest threshold;
+S_self per alpha and Sim_User per (threshold, top_n) are cached while a
+surviving config still uses them (survivors only shrink, so a dropped
+matrix is never needed again), and the history / collaborative blocks of
+a round are shared by all configs that only differ in w.
+"""
+
+import itertools
+import time
+
+import numpy as np
+
+from . import evaluation, matrices, scoring
+
+PARAMS = ('alpha', 'thresh', 'top_n', 'w')
+DEFAULT_STRATA = 5
+
+
+def sample_configs(space, n_configs=None, seed=42):
+    """
+    List of config dicts. With only list-valued parameters and no
+    n_configs this is the full grid; otherwise n_configs configs, each
+    parameter drawn from its list or uniformly from its (low, high) range.
+    """
+    if n_configs is None:
+        if any(isinstance(values, tuple) for values in space.values()):
+            raise ValueError("n_configs is required when the space has (low, high) ranges")
+        names = list(space)
+        return [dict(zip(names, values)) for values in itertools.product(*space.values())]
+
+    rng = np.random.default_rng(seed)
+    configs = []
+    for _ in range(n_configs):
+        config = {}
+        for name, values in space.items():
+            if isinstance(values, tuple):
+                config[name] = float(rng.uniform(*values))
+            else:
+                config[name] = values[rng.integers(len(values))]
+        configs.append(config)
+    return configs
+
+
+def stratified_order(activity, n_strata=DEFAULT_STRATA, seed=42):
+    """
+    Permutation of range(len(activity)) whose every prefix holds each
+    activity quantile stratum in proportion to its size.
+    """
+    rng = np.random.default_rng(seed)
+    edges = np.quantile(activity, np.linspace(0, 1, n_strata + 1)[1:-1])
+    strata = np.searchsorted(edges, activity, side='right')
+    order = np.empty(len(activity))
+    for stratum in np.unique(strata):
+        members = np.flatnonzero(strata == stratum)
+        # Evenly spaced positions in (0, 1), shuffled within the stratum
+        order[members] = (rng.permutation(len(members)) + rng.random(len(members))) / len(members)
+    return np.argsort(order, kind='stable')
+
+
+def round_sizes(n_users, n_configs, min_users, eta):
+    """
+    Sample size of every round: min_users, times eta each round, the last
+    round on all n_users. Stops as soon as one config would be left.
+    """
+    sizes, size, configs = [], min_users, n_configs
+    while size < n_users and configs > 1:
+        sizes.append(size)
+        size *= eta
+        configs = max(1, int(np.ceil(configs / eta)))
+    sizes.append(n_users)
+    return sizes
+
+
+def successive_halving(train_df, users, items, eval_rows, truth, configs, min_users=200, eta=3,
+                       k=10, metric='MAP@10', n_strata=DEFAULT_STRATA, seed=42, compact=False,
+                       verbose=True):
+    """
+    Runs the search. eval_rows are the matrix rows of the test users and
+    truth their (len(eval_rows), n_items) ground truth (evaluation.ground_truth).
+    Returns one dict per round: 'users' (sample size), 'results' (one
+    result dict per evaluated config, best first), 'evaluations'
+    (configs x users scored) and 'time'. compact stores the matrices as
+    in grid_search.grid_search.
+    """
+    shape = (len(users), len(items))
+    rows, cols = matrices.encode(train_df, users, items)
+    X_bin = matrices.interaction_matrix(rows, cols, shape, compact)
+    raw_sim = matrices.blocked_jaccard(X_bin, min(c['thresh'] for c in configs), compact=compact)
+
+    eval_rows = np.asarray(eval_rows)
+    truth = truth.tocsr()
+    activity = np.asarray(X_bin[eval_rows].sum(axis=1)).ravel()
+    order = stratified_order(activity, n_strata, seed)
+
+    s_self_cache, sim_cache = {}, {}
+    sizes = round_sizes(len(eval_rows), len(configs), min_users, eta)
+    rounds, survivors = [], list(configs)
+    if verbose:
+        print(f"  {len(configs)} configs, rounds on {sizes} users (eta {eta})")
+        print(f"  {'Round':<6} {'Users':<7} {'Configs':<8} {'Best':<9} {'Time':<6}")
+
+    for round_index, size in enumerate(sizes):
+        start = time.time()
+        sample = np.sort(order[:size])
+        sample_rows, sample_truth = eval_rows[sample], truth[sample]
+
+        # Configs differing only in w share their score blocks
+        results = []
+        groups = {}
+        for config in survivors:
+            groups.setdefault((config['alpha'], config['thresh'], config['top_n']), []).append(config)
+        for (alpha, thresh, top_n), group in groups.items():
+            if alpha not in s_self_cache:
+                s_self_cache[alpha] = matrices.recency_matrix(train_df, rows, cols, alpha, shape,
+                                                              compact=compact)
+            if (thresh, top_n) not in sim_cache:
+                sim_cache[(thresh, top_n)] = matrices.top_n_neighbors(
+                    matrices.threshold_similarity(raw_sim, thresh), top_n)
+            history, collab = scoring.score_components(s_self_cache[alpha],
+                                                       sim_cache[(thresh, top_n)], sample_rows)
+            for config in group:
+                recs = scoring.recommend_from_components(history, collab, config['w'], k=k)
+                metrics = evaluation.evaluate(recs, sample_truth, k=k)
+                results.append(dict(config, score=metrics[metric], metrics=metrics))
+
+        results.sort(key=lambda r: -r['score'])
+        rounds.append({'users': size, 'results': results, 'evaluations': len(results) * size,
+                       'time': time.time() - start})
+        if verbose:
+            print(f"  {round_index + 1:<6} {size:<7} {len(results):<8} "
+                  f"{results[0]['score']:.5f}  {time.time() - start:.1f}s")
+        keep = max(1, int(np.ceil(len(results) / eta)))
+        survivors = [{name: r[name] for name in PARAMS} for r in results[:keep]]
+        # Free the matrices of the eliminated configs
+        alphas = {config['alpha'] for config in survivors}
+        sim_keys = {(config['thresh'], config['top_n']) for config in survivors}
+        s_self_cache = {alpha: m for alpha, m in s_self_cache.items() if alpha in alphas}
+        sim_cache = {key: m for key, m in sim_cache.items() if key in sim_keys}
+    return rounds
+
+
+def best_result(rounds):
+    """
+    Best config of the last round (the only one scored on every test user).
+    """
+    return rounds[-1]['results'][0]
+
+
+def evaluations(rounds):
+    """
+    Total configs x users scored over all rounds.
+    """
+    return sum(r['evaluations'] for r in rounds)
@@ -0,0 +1,198 @@
+"""
+Lightweight stage instrumentation: nested spans written as JSON lines.
+
+    from recommender import instrument
+    instrument.configure('trace.jsonl')            # off (no-op spans) until configured
+    with instrument.span('build_matrices', alpha=0.7) as s:
+        S_self, Sim_User = ...
+        s.set(**instrument.nnz(S_self=S_self, Sim_User=Sim_User))
+    instrument.print_summary(instrument.load('trace.jsonl'))
+
+Every finished span is one JSON line: name, path ('train/grid/cell'),
+depth, wall and CPU seconds and process max RSS, plus any attributes
+given to span() or set(). Spans nest. Lines are appended as spans close,
+so process-pool workers (forked after configure()) write into the same
+file.
+
+With trace_memory=True a span also records its peak traced memory
+(tracemalloc; a child's peak counts towards its parents'). It is off by
+default: tracemalloc hooks every allocation, which makes allocation-heavy
+stages several times slower (the script's submission stage most of all)
+and so skews the very timings being measured.
+
+print_summary() aggregates spans by path into an indented, flame-style
+table: calls, total and self wall time, share of the root, CPU time, max
+RSS and (when traced) peak memory.
+"""
+
+import functools
+import json
+import os
+import resource
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+
+class Span:
+    """
+    An open span; set() attaches attributes to its JSON line.
+    """
+
+    def __init__(self, name, path, depth, attrs):
+        self.name = name
+        self.path = path
+        self.depth = depth
+        self.attrs = attrs
+        self.peak = 0
+
+    def set(self, **attrs):
+        self.attrs.update(attrs)
+
+
+class Tracer:
+    """
+    Writes spans to path; with path=None every span is a no-op.
+    """
+
+    def __init__(self, path=None, trace_memory=False):
+        self.path = path
+        self.trace_memory = trace_memory
+        self.stack = []
+        self.origin = time.perf_counter()
+
+    @property
+    def enabled(self):
+        return self.path is not None
+
+    def _flush_peak(self):
+        # Folds the tracemalloc peak since the last reset into the open spans
+        if self.trace_memory and tracemalloc.is_tracing():
+            peak = tracemalloc.get_traced_memory()[1]
+            for open_span in self.stack:
+                open_span.peak = max(open_span.peak, peak)
+            tracemalloc.reset_peak()
+
+    @contextmanager
+    def span(self, name, **attrs):
+        if not self.enabled:
+            yield Span(name, name, 0, attrs)
+            return
+
+        self._flush_peak()
+        parent = self.stack[-1].path + '/' if self.stack else ''
+        current = Span(name, parent + name, len(self.stack), attrs)
+        self.stack.append(current)
+        start_wall, start_cpu = time.perf_counter(), time.process_time()
+        try:
+            yield current
+        finally:
+            wall = time.perf_counter() - start_wall
+            cpu = time.process_time() - start_cpu
+            self._flush_peak()
+            self.stack.pop()
+            record = {'name': name, 'path': current.path, 'depth': current.depth,
+                      'start': start_wall - self.origin, 'wall': wall, 'cpu': cpu,
+                      'max_rss_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+                      'pid': os.getpid()}
+            if self.trace_memory:
+                record['peak_mb'] = current.peak / 2**20
+            record.update(current.attrs)
+            with open(self.path, 'a') as f:
+                f.write(json.dumps(record, default=str) + '\n')
+
+
+TRACER = Tracer()
+
+
+def configure(path, trace_memory=False, append=False):
+    """
+    Turns instrumentation on for the module-level tracer, writing to path
+    (truncated unless append). Memory is max RSS only unless trace_memory,
+    which starts tracemalloc for per-span peaks at the cost of distorted
+    wall times (every allocation goes through its hooks).
+    """
+    global TRACER
+    if not append:
+        open(path, 'w').close()
+    if trace_memory and not tracemalloc.is_tracing():
+        tracemalloc.start()
+    TRACER = Tracer(path, trace_memory)
+    return TRACER
+
+
+def span(name, **attrs):
+    """
+    Context manager span on the module-level tracer.
+    """
+    return TRACER.span(name, **attrs)
+
+
+def traced(name=None):
+    """
+    Decorator: every call of the function is a span.
+    """
+    def decorate(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with span(name or fn.__name__):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+def nnz(**named_matrices):
+    """
+    {'<name>_nnz': matrix.nnz} attributes for span.set().
+    """
+    return {f"{name}_nnz": matrix.nnz for name, matrix in named_matrices.items()}
+
+
+def load(path):
+    """
+    Span records of a JSON lines file.
+    """
+    with open(path) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def summarize(records):
+    """
+    One row per span path, in first-seen order: calls, total / self wall,
+    CPU, max RSS, peak traced memory (None when not traced). Self time is
+    total minus the direct children's.
+    """
+    rows = {}
+    for record in sorted(records, key=lambda r: r['start']):
+        row = rows.setdefault(record['path'], {'path': record['path'], 'name': record['name'],
+                                               'depth': record['depth'], 'calls': 0, 'wall': 0.0,
+                                               'cpu': 0.0, 'rss_mb': 0.0, 'peak_mb': None})
+        row['calls'] += 1
+        row['wall'] += record['wall']
+        row['cpu'] += record['cpu']
+        row['rss_mb'] = max(row['rss_mb'], record.get('max_rss_mb', 0.0))
+        if 'peak_mb' in record:
+            row['peak_mb'] = max(row['peak_mb'] or 0.0, record['peak_mb'])
+    for row in rows.values():
+        children = [other['wall'] for other in rows.values()
+                    if other['depth'] == row['depth'] + 1 and other['path'].startswith(row['path'] + '/')]
+        row['self'] = row['wall'] - sum(children)
+    return list(rows.values())
+
+
+def print_summary(records, bar_width=20):
+    """
+    Indented flame-style table of summarize(records).
+    """
+    rows = summarize(records)
+    total = sum(row['wall'] for row in rows if row['depth'] == 0) or 1.0
+    print(f"  {'Span':<36} {'Calls':>6} {'Wall s':>9} {'Self s':>9} {'CPU s':>9} "
+          f"{'RSS MB':>8} {'Peak MB':>8}  Share")
+    for row in rows:
+        label = '  ' * row['depth'] + row['name']
+        share = row['wall'] / total
+        peak = '-' if row['peak_mb'] is None else f"{row['peak_mb']:.1f}"
+        print(f"  {label:<36} {row['calls']:>6} {row['wall']:>9.2f} {row['self']:>9.2f} "
+              f"{row['cpu']:>9.2f} {row['rss_mb']:>8.0f} {peak:>8}  {'#' * round(share * bar_width):<{bar_width}} "
+              f"{share:.0%}")
+    return rows
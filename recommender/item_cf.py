@@ -0,0 +1,178 @@
+"""
+Item-based CF engine: precomputed top-N item-item similarity.
+
+The item x item similarity (Jaccard or cosine over the columns of X_bin,
+i.e. the co-borrow counts behind book_user_history.csv) is computed once,
+block by block, and pruned to the top_n neighbours of every book. A user
+is then scored by summing the neighbour lists of the books they borrowed,
+weighted by their recency score:
+
+    Score(u, .) = w * S_self[u] + (1 - w) * S_self[u] @ Sim_Item
+
+The product only touches len(history) * top_n entries, so scoring cost
+depends on the user's history length, not on the number of users (the
+user-user Sim_User[u] @ S_self walks every neighbour's whole history).
+
+    model = ItemCFModel(similarity='cosine', top_n=50).fit(interactions)
+    model.recommend([0, 1, 2], k=10)
+"""
+
+import json
+import os
+
+import numpy as np
+from scipy.sparse import csr_matrix, vstack
+
+from . import matrices, scoring
+from .model import load_csr, save_csr, user_rows
+
+SIMILARITIES = ('jaccard', 'cosine')
+
+
+def cosine_rows(X, rows, norms):
+    """
+    Cosine between the given rows of X and every row, as a
+    (len(rows), n_rows) CSR matrix without the diagonal.
+    """
+    rows = np.asarray(rows)
+    dot = (X[rows] @ X.T).tocoo()
+    r, j, v = dot.row, dot.col, dot.data
+    keep = (rows[r] != j) & (v > 0)
+    r, j, v = r[keep], j[keep], v[keep]
+    sim = v / (norms[rows[r]] * norms[j])
+    return csr_matrix((sim, (r, j)), shape=(len(rows), X.shape[0]))
+
+
+def item_similarity(X_bin, similarity='cosine', top_n=50,
+                    max_block_bytes=matrices.DEFAULT_MAX_BLOCK_BYTES):
+    """
+    (n_items x n_items) similarity over the columns of X_bin, keeping the
+    top_n neighbours of every item (all of them when top_n is None).
+    Computed on row blocks of X_bin.T like matrices.blocked_jaccard.
+    """
+    if similarity not in SIMILARITIES:
+        raise ValueError(f"similarity must be one of {SIMILARITIES}, got {similarity!r}")
+    X_items = X_bin.T.tocsr()
+    if similarity == 'jaccard':
+        return matrices.blocked_jaccard(X_items, max_block_bytes=max_block_bytes, top_n=top_n)
+
+    norms = np.sqrt(np.asarray(X_items.multiply(X_items).sum(axis=1)).ravel())
+    blocks = []
+    for start, stop in matrices.block_bounds(X_items, max_block_bytes):
+        block = cosine_rows(X_items, np.arange(start, stop), norms)
+        blocks.append(matrices.top_n_neighbors(block, top_n))
+    return vstack(blocks, format='csr')
+
+
+def recent_history(S_self, recent):
+    """
+    Keeps the `recent` highest recency scores of every user, i.e. their
+    most recently (or most often) borrowed books. None keeps everything.
+    """
+    return matrices.top_n_neighbors(S_self, recent)
+
+
+def recommend_top_k(S_self, Sim_Item, w, k=10, user_rows=None, recent=None,
+                    batch_size=scoring.DEFAULT_BATCH_SIZE):
+    """
+    Top-k item columns for every row in user_rows (default: all users),
+    scored from the item neighbour lists.
+    """
+    S_self = S_self.tocsr()
+    Sim_Item = Sim_Item.tocsr()
+    if user_rows is None:
+        user_rows = np.arange(S_self.shape[0])
+    user_rows = np.asarray(user_rows)
+
+    k = min(k, S_self.shape[1])
+    recs = np.empty((len(user_rows), k), dtype=np.int64)
+    for start in range(0, len(user_rows), batch_size):
+        rows = user_rows[start:start + batch_size]
+        history = S_self[rows]
+        collab = recent_history(history, recent) @ Sim_Item
+        recs[start:start + len(rows)] = scoring.top_k(scoring.blend(history, collab, w), k)
+    return recs
+
+
+class ItemCFModel:
+    """
+    Recency-weighted self-history + top-N item-item CF.
+    Same fit / recommend / save / load interface as UserCFModel.
+    """
+
+    def __init__(self, alpha=0.7, similarity='cosine', top_n=50, w_history=0.9, recent=None):
+        self.alpha = alpha
+        self.similarity = similarity
+        self.top_n = top_n
+        self.w_history = w_history
+        self.recent = recent
+        self.users = None
+        self.items = None
+        self.popular = None
+        self.S_self = None
+        self.Sim_Item = None
+
+    def params(self):
+        return {'alpha': self.alpha, 'similarity': self.similarity, 'top_n': self.top_n,
+                'w_history': self.w_history, 'recent': self.recent}
+
+    def fit(self, interactions_df):
+        """
+        Builds S_self and the pruned item-item similarity.
+        """
+        self.users, self.items = matrices.build_mappings(interactions_df)
+        shape = (len(self.users), len(self.items))
+        rows, cols = matrices.encode(interactions_df, self.users, self.items)
+        self.S_self = matrices.recency_matrix(interactions_df, rows, cols, self.alpha, shape)
+        X_bin = matrices.interaction_matrix(rows, cols, shape)
+        self.Sim_Item = item_similarity(X_bin, self.similarity, self.top_n)
+
+        counts = np.bincount(cols, minlength=shape[1])
+        self.popular = np.argsort(-counts, kind='stable')
+        return self
+
+    def recommend_rows(self, user_rows, k=10):
+        return recommend_top_k(self.S_self, self.Sim_Item, self.w_history, k=k,
+                               user_rows=user_rows, recent=self.recent)
+
+    def recommend(self, user_ids, k=10):
+        """
+        (len(user_ids), k) array of recommended item ids, best first.
+        Unknown users get the most borrowed items.
+        """
+        rows = user_rows(self.users, user_ids)
+        k = min(k, len(self.items))
+        top_indices = np.tile(self.popular[:k], (len(rows), 1))
+        known = rows >= 0
+        if known.any():
+            top_indices[known] = self.recommend_rows(rows[known], k)
+        return np.asarray(self.items)[top_indices]
+
+    def nbytes(self):
+        return matrices.total_nbytes(self.S_self, self.Sim_Item)
+
+    def save(self, directory):
+        """
+        Writes the model as .npy files + params.json into directory.
+        """
+        os.makedirs(directory, exist_ok=True)
+        save_csr(directory, 'S_self', self.S_self)
+        save_csr(directory, 'Sim_Item', self.Sim_Item)
+        for name in ('users', 'items', 'popular'):
+            np.save(os.path.join(directory, f"{name}.npy"), getattr(self, name))
+        with open(os.path.join(directory, 'params.json'), 'w') as f:
+            json.dump(self.params(), f, indent=2)
+
+    @classmethod
+    def load(cls, directory, mmap_mode='r'):
+        """
+        Opens a saved model, memory-mapped by default.
+        """
+        with open(os.path.join(directory, 'params.json')) as f:
+            model = cls(**json.load(f))
+        for name in ('users', 'items', 'popular'):
+            setattr(model, name, np.load(os.path.join(directory, f"{name}.npy"), mmap_mode=mmap_mode))
+        shape = (len(model.users), len(model.items))
+        model.S_self = load_csr(directory, 'S_self', shape, mmap_mode)
+        model.Sim_Item = load_csr(directory, 'Sim_Item', (shape[1], shape[1]), mmap_mode)
+        return model
@@ -0,0 +1,190 @@
+"""
+Approximate user-user similarity with MinHash + banded LSH.
+
+The exact X_bin @ X_bin.T grows quadratically with the number of users.
+Here every user's item set is summarised by n_hashes MinHash values; the
+signature is cut into `bands` bands of `rows` values and users sharing a
+band become candidate neighbours. Only candidate pairs get a similarity,
+either estimated from the signatures (fraction of equal MinHash values,
+an estimate of the set Jaccard) or recomputed exactly from X_bin with the
+same formula as matrices.raw_jaccard.
+
+A pair with Jaccard s is found with probability 1 - (1 - s ** rows) ** bands,
+so low thresholds such as 0.05 need rows=1 and many bands.
+
+The output is a symmetric CSR Sim_User that scoring.recommend_top_k
+accepts, but this is not a replacement for matrices.blocked_jaccard,
+and neither the script, the model nor the grid search uses it. It is
+only meant for user counts where the exact product no longer fits in
+memory (around 100k users here). Below that, exact Jaccard is 5-7x
+faster (benchmarks/bench_minhash.py at 10k-30k users). Candidates are
+verified exactly by default (exact=True). The signature estimates
+(exact=False) measure the Jaccard of binarized rows rather than
+Sim_User's count-based one, and found only ~75% of the exact pairs
+in that benchmark.
+"""
+
+import numpy as np
+from scipy.sparse import csr_matrix
+
+# Mersenne prime for the universal hash (a * x + b) mod P
+HASH_PRIME = (1 << 31) - 1
+DEFAULT_CHUNK_USERS = 20000
+
+
+def minhash_signatures(X_bin, n_hashes=128, seed=42, chunk_users=DEFAULT_CHUNK_USERS):
+    """
+    (n_users, n_hashes) uint32 MinHash signatures of the item sets of X_bin.
+    Users with no item get the max value everywhere (never candidates).
+    Users are processed in chunks so memory stays O(chunk nnz * n_hashes).
+    """
+    X_bin = X_bin.tocsr()
+    rng = np.random.default_rng(seed)
+    a = rng.integers(1, HASH_PRIME, n_hashes, dtype=np.uint64)
+    b = rng.integers(0, HASH_PRIME, n_hashes, dtype=np.uint64)
+
+    n_users = X_bin.shape[0]
+    signatures = np.full((n_users, n_hashes), np.iinfo(np.uint32).max, dtype=np.uint32)
+    for start in range(0, n_users, chunk_users):
+        stop = min(start + chunk_users, n_users)
+        indptr = X_bin.indptr[start:stop + 1]
+        items = X_bin.indices[indptr[0]:indptr[-1]].astype(np.uint64)
+        if len(items) == 0:
+            continue
+        hashes = ((items[:, None] * a + b) % HASH_PRIME).astype(np.uint32)
+
+        offsets = indptr[:-1] - indptr[0]
+        non_empty = np.diff(indptr) > 0
+        mins = np.minimum.reduceat(hashes, offsets[non_empty], axis=0)
+        signatures[start + np.flatnonzero(non_empty)] = mins
+    return signatures
+
+
+def _band_keys(band):
+    # One uint64 key per user for a (n_users, rows) slice of the signature
+    keys = np.zeros(band.shape[0], dtype=np.uint64)
+    for col in band.T:
+        keys = keys * np.uint64(0x100000001B3) + col.astype(np.uint64)
+    return keys
+
+
+def _bucket_pairs(keys, valid, max_bucket):
+    """
+    All (i, j), i < j, of users sharing a key. Buckets larger than
+    max_bucket are skipped: they are made of very popular items and would
+    produce a quadratic number of weak candidates.
+    """
+    users = np.flatnonzero(valid)
+    order = users[np.argsort(keys[users], kind='stable')]
+    sorted_keys = keys[order]
+
+    starts = np.flatnonzero(np.r_[True, sorted_keys[1:] != sorted_keys[:-1]])
+    sizes = np.diff(np.r_[starts, len(order)])
+    keep = (sizes > 1) & (sizes <= max_bucket)
+    starts, sizes = starts[keep], sizes[keep]
+    if len(starts) == 0:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+
+    # Position of every member, and how many later members it pairs with
+    member = np.repeat(starts, sizes) + (np.arange(sizes.sum()) - np.repeat(np.cumsum(sizes) - sizes, sizes))
+    n_after = np.repeat(starts + sizes, sizes) - member - 1
+    first = np.repeat(member, n_after)
+    offset = np.arange(n_after.sum()) - np.repeat(np.cumsum(n_after) - n_after, n_after)
+    second = first + 1 + offset
+
+    i, j = order[first], order[second]
+    return np.minimum(i, j), np.maximum(i, j)
+
+
+def _dedupe(keys):
+    # Sort-based unique, faster than np.unique on large int64 arrays
+    keys = np.sort(keys)
+    return keys[np.r_[True, keys[1:] != keys[:-1]]] if len(keys) else keys
+
+
+def candidate_pairs(signatures, bands, rows, max_bucket=1000):
+    """
+    Unique (i, j) candidate pairs, i < j, from banded LSH.
+    Pairs are merged band after band, so memory follows the number of
+    distinct candidates rather than bands * candidates.
+    """
+    n_users, n_hashes = signatures.shape
+    if bands * rows > n_hashes:
+        raise ValueError(f"bands * rows ({bands} * {rows}) exceeds n_hashes ({n_hashes})")
+
+    valid = signatures[:, 0] != np.iinfo(np.uint32).max
+    pair_keys = np.empty(0, dtype=np.int64)
+    pending, pending_size = [], 0
+    for band in range(bands):
+        keys = _band_keys(signatures[:, band * rows:(band + 1) * rows])
+        i, j = _bucket_pairs(keys, valid, max_bucket)
+        # A pair appears at most once per band, dedupe only across bands
+        pending.append(i.astype(np.int64) * n_users + j)
+        pending_size += len(i)
+        if pending_size > max(len(pair_keys), 1_000_000) or band == bands - 1:
+            pair_keys = _dedupe(np.concatenate([pair_keys] + pending))
+            pending, pending_size = [], 0
+    return pair_keys // n_users, pair_keys % n_users
+
+
+def estimated_jaccard(signatures, i, j, chunk_pairs=1_000_000):
+    """
+    Fraction of equal MinHash values of every (i, j) pair.
+    """
+    estimates = np.empty(len(i), dtype=np.float64)
+    for start in range(0, len(i), chunk_pairs):
+        stop = start + chunk_pairs
+        estimates[start:stop] = (signatures[i[start:stop]] == signatures[j[start:stop]]).mean(axis=1)
+    return estimates
+
+
+def exact_jaccard(X_bin, i, j, chunk_pairs=1_000_000):
+    """
+    matrices.raw_jaccard values (borrow-count Jaccard) of the (i, j) pairs
+    only, from row-wise sparse dot products. Pairs with a non-positive
+    union get 0.
+    """
+    X_bin = X_bin.tocsr()
+    user_counts = np.asarray(X_bin.sum(axis=1)).ravel()
+    sims = np.zeros(len(i), dtype=np.float64)
+    for start in range(0, len(i), chunk_pairs):
+        stop = start + chunk_pairs
+        ii, jj = i[start:stop], j[start:stop]
+        v = np.asarray(X_bin[ii].multiply(X_bin[jj]).sum(axis=1)).ravel()
+        union = user_counts[ii] + user_counts[jj] - v
+        positive = union > 0
+        sims[start:stop][positive] = v[positive] / union[positive]
+    return sims
+
+
+def lsh_similarity(X_bin, sim_threshold, n_hashes=128, bands=128, rows=1, seed=42,
+                   max_bucket=1000, exact=True):
+    """
+    Approximate thresholded Sim_User (users x users, symmetric, no diagonal).
+    With exact=True (default) the candidate similarities are recomputed from
+    X_bin, so the only error left is the pairs LSH missed; exact=False uses
+    the signature estimates of the binarized Jaccard instead.
+    """
+    signatures = minhash_signatures(X_bin, n_hashes, seed)
+    i, j = candidate_pairs(signatures, bands, rows, max_bucket)
+    sims = exact_jaccard(X_bin, i, j) if exact else estimated_jaccard(signatures, i, j)
+
+    keep = sims > sim_threshold
+    i, j, sims = i[keep], j[keep], sims[keep]
+    n_users = X_bin.shape[0]
+    return csr_matrix((np.r_[sims, sims], (np.r_[i, j], np.r_[j, i])), shape=(n_users, n_users))
+
+
+def pair_recall(approx, exact):
+    """
+    Share of the exact matrix's non-zero pairs that approx also has.
+    """
+    exact = exact.tocoo()
+    approx = approx.tocsr()
+    if exact.nnz == 0:
+        return 1.0
+    n = exact.shape[1]
+    approx_coo = approx.tocoo()
+    found = np.isin(exact.row.astype(np.int64) * n + exact.col,
+                    approx_coo.row.astype(np.int64) * n + approx_coo.col)
+    return float(found.mean())
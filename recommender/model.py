@@ -0,0 +1,356 @@
+"""
+Persisted user-based CF model.
+
+    model = UserCFModel(alpha=0.7, sim_threshold=0.05, w_history=0.9).fit(interactions)
+    model.save('model')
+    ...
+    model = UserCFModel.load('model')          # memory-mapped, no retraining
+    recs = model.recommend([0, 1, 2], k=10)    # (3, 10) array of item ids
+
+A saved model is a directory of plain .npy files (the CSR arrays of S_self
+and Sim_User, the user / item id arrays, the popularity fallback, the raw
+interaction log) plus a params.json, so every array can be opened with
+np.load(mmap_mode='r').
+
+New borrows are folded in with model.update(new_interactions), which only
+recomputes the rows of the users who borrowed (see update()). Daily
+updates that bring the newest borrows should fix the recency reference
+time (reference_t), otherwise every S_self value moves with them.
+"""
+
+import json
+import os
+
+import numpy as np
+from scipy.sparse import csr_matrix
+
+from . import instrument, matrices, scoring
+
+CSR_ARRAYS = ('data', 'indices', 'indptr')
+LOG_COLUMNS = ('u', 'i', 't')
+
+
+def save_csr(directory, name, matrix):
+    """
+    Writes the CSR arrays of matrix as <name>_<array>.npy files.
+    """
+    matrix = matrix.tocsr()
+    for array in CSR_ARRAYS:
+        np.save(os.path.join(directory, f"{name}_{array}.npy"), getattr(matrix, array))
+
+
+def load_csr(directory, name, shape, mmap_mode='r'):
+    """
+    CSR matrix on top of the (memory-mapped) arrays written by save_csr.
+    """
+    arrays = [np.load(os.path.join(directory, f"{name}_{array}.npy"), mmap_mode=mmap_mode)
+              for array in CSR_ARRAYS]
+    return csr_matrix(tuple(arrays), shape=shape, copy=False)
+
+
+def reindex(matrix, row_map, col_map, shape):
+    """
+    Moves entry (r, c) of matrix to (row_map[r], col_map[c]) in a matrix
+    of the given (larger) shape.
+    """
+    coo = matrix.tocoo()
+    return csr_matrix((coo.data, (row_map[coo.row], col_map[coo.col])), shape=shape)
+
+
+def replace_rows(matrix, rows, new_rows):
+    """
+    Copy of matrix where rows[r] is replaced by row r of new_rows.
+    """
+    coo = matrix.tocoo()
+    keep = ~np.isin(coo.row, rows)
+    new = new_rows.tocoo()
+    return csr_matrix((np.concatenate([coo.data[keep], new.data]),
+                       (np.concatenate([coo.row[keep], rows[new.row]]),
+                        np.concatenate([coo.col[keep], new.col]))),
+                      shape=matrix.shape)
+
+
+def replace_symmetric_rows(matrix, rows, new_rows):
+    """
+    Copy of the symmetric matrix where rows[r] and column rows[r] are both
+    replaced by row r of new_rows.
+    """
+    coo = matrix.tocoo()
+    keep = ~(np.isin(coo.row, rows) | np.isin(coo.col, rows))
+    new = new_rows.tocoo()
+    new_row = rows[new.row]
+    # Mirror the new rows into the columns, except the block already covered
+    mirror = ~np.isin(new.col, rows)
+    return csr_matrix((np.concatenate([coo.data[keep], new.data, new.data[mirror]]),
+                       (np.concatenate([coo.row[keep], new_row, new.col[mirror]]),
+                        np.concatenate([coo.col[keep], new.col, new_row[mirror]]))),
+                      shape=matrix.shape)
+
+
+def user_rows(users, user_ids):
+    """
+    Row of every user id in the sorted id array users, -1 for users a
+    model has not seen. Shared by the UserCF, ItemCF and ALS engines.
+    """
+    user_ids = np.asarray(user_ids)
+    rows = np.searchsorted(users, user_ids)
+    rows = np.minimum(rows, len(users) - 1)
+    return np.where(users[rows] == user_ids, rows, -1)
+
+
+class UserCFModel:
+    """
+    Recency-weighted self-history + Jaccard user-user CF.
+    Score(u, i) = w_history * S_self[u, i] + (1 - w_history) * (Sim_User @ S_self)[u, i]
+
+    Recency is counted back from reference_t (a timestamp, in the unit of
+    the 't' column), by default the latest borrow of the interactions.
+    """
+
+    def __init__(self, alpha=0.7, sim_threshold=0.05, w_history=0.9, top_n=None, compact=False,
+                 reference_t=None):
+        self.alpha = alpha
+        self.sim_threshold = sim_threshold
+        self.w_history = w_history
+        self.top_n = top_n
+        # float32 values / uint8 counts / int32 indices (see matrices.py)
+        self.compact = compact
+        # Fixed recency reference time; None follows the latest borrow
+        self.reference_t = None if reference_t is None else float(reference_t)
+        self.users = None
+        self.items = None
+        self.popular = None
+        self.S_self = None
+        self.Sim_User = None
+        self.log = None
+        self.X_bin = None
+        self.recs_cache = None
+
+    def params(self):
+        return {'alpha': self.alpha, 'sim_threshold': self.sim_threshold,
+                'w_history': self.w_history, 'top_n': self.top_n, 'compact': self.compact,
+                'reference_t': self.reference_t}
+
+    def fit(self, interactions_df):
+        """
+        Builds the matrices from a (u, i, t) interaction frame.
+        """
+        self.log = {col: interactions_df[col].to_numpy() for col in LOG_COLUMNS}
+        self.users, self.items = matrices.build_mappings(interactions_df)
+        shape = (len(self.users), len(self.items))
+
+        rows, cols = matrices.encode(interactions_df, self.users, self.items)
+        with instrument.span('recency_matrix') as span:
+            self.S_self = matrices.recency_matrix(interactions_df, rows, cols, self.alpha, shape,
+                                                  max_time=self.reference_t, compact=self.compact)
+            span.set(**instrument.nnz(S_self=self.S_self))
+        with instrument.span('interaction_matrix') as span:
+            self.X_bin = matrices.interaction_matrix(rows, cols, shape, self.compact)
+            span.set(**instrument.nnz(X_bin=self.X_bin))
+        with instrument.span('blocked_jaccard') as span:
+            self.Sim_User = matrices.blocked_jaccard(self.X_bin, self.sim_threshold,
+                                                     top_n=self.top_n, compact=self.compact)
+            span.set(**instrument.nnz(Sim_User=self.Sim_User))
+        self._update_popular(cols)
+        self.recs_cache = None
+        return self
+
+    def _similarity(self, user_rows):
+        # Thresholded (and top_n pruned) Jaccard rows of the given users
+        return matrices.top_n_neighbors(self._similarity_unpruned(user_rows), self.top_n)
+
+    def _similarity_unpruned(self, user_rows):
+        return matrices.jaccard_rows(self.X_bin, user_rows, self.sim_threshold,
+                                     compact=self.compact)
+
+    def _update_popular(self, cols):
+        # Most borrowed items first, used for users unknown to the model
+        counts = np.bincount(cols, minlength=len(self.items))
+        self.popular = np.argsort(-counts, kind='stable')
+
+    def _reference_time(self):
+        # Recency reference of the current log
+        return self.log['t'].max() if self.reference_t is None else self.reference_t
+
+    def _encoded_log(self):
+        rows = np.searchsorted(self.users, self.log['u'])
+        cols = np.searchsorted(self.items, self.log['i'])
+        return rows, cols
+
+    def update(self, new_interactions_df):
+        """
+        Adds new (u, i, t) borrows without a full rebuild.
+
+        - X_bin (borrow counts) gets the new counts added,
+        - the Jaccard rows / columns of the users who borrowed are
+          recomputed from their intersection counts only (with top_n, the
+          pruned rows of their unpruned neighbours are recomputed too, as
+          their top_n may have changed),
+        - their S_self rows are rebuilt from their own log entries,
+        - cached recommendations (cache_recommendations) are refreshed for
+          every user whose Sim_User row changed or who has one of those
+          users as a neighbour.
+        Without a reference_t, new borrows more recent than everything seen
+        so far move the recency reference date and every S_self value
+        changes: S_self is then recomputed from the log in one vectorized
+        pass (still no user-user product) and every cached row is
+        refreshed, so a daily update of the newest borrows costs about a
+        full rescoring. With a fixed reference_t only the touched rows are
+        rebuilt (borrows after reference_t count as on reference_t).
+
+        The result is identical to fit() on the concatenated interactions.
+        """
+        new = {col: new_interactions_df[col].to_numpy() for col in LOG_COLUMNS}
+        if self.X_bin is None:
+            # Loaded models do not persist X_bin, it is rebuilt from the log
+            rows, cols = self._encoded_log()
+            self.X_bin = matrices.interaction_matrix(rows, cols, self.S_self.shape, self.compact)
+
+        self._grow_mappings(new['u'], new['i'])
+        n_users, n_items = len(self.users), len(self.items)
+
+        old_max_time = self._reference_time()
+        self.log = {col: np.concatenate([self.log[col], new[col]]) for col in LOG_COLUMNS}
+        new_rows = np.searchsorted(self.users, new['u'])
+        new_cols = np.searchsorted(self.items, new['i'])
+        changed = np.unique(new_rows)
+
+        # Borrow counts and Jaccard of the touched users
+        if self.top_n is None:
+            old_neighbors = self.Sim_User[changed].indices
+        else:
+            old_neighbors = self._similarity_unpruned(changed).indices
+        new_counts = matrices.interaction_matrix(new_rows, new_cols, (n_users, n_items))
+        if self.compact:
+            # Added in int32, then narrowed again (uint8 + uint8 could overflow)
+            self.X_bin = matrices.compact_counts(self.X_bin.astype(np.int32) + new_counts.astype(np.int32))
+        else:
+            self.X_bin = self.X_bin + new_counts
+
+        if self.top_n is None:
+            # Unpruned Sim_User is symmetric: rows and columns of the touched users
+            sim_rows = self._similarity(changed)
+            self.Sim_User = replace_symmetric_rows(self.Sim_User, changed, sim_rows)
+            new_neighbors = sim_rows.indices
+        else:
+            new_neighbors = self._similarity_unpruned(changed).indices
+        sim_changed = np.unique(np.concatenate([changed, old_neighbors, new_neighbors]))
+        if self.top_n is not None:
+            self.Sim_User = replace_rows(self.Sim_User, sim_changed, self._similarity(sim_changed))
+
+        # Recency
+        log_rows, log_cols = self._encoded_log()
+        max_time = self._reference_time()
+        if max_time > old_max_time:
+            scores = matrices.recency_scores(self.log['t'], self.alpha, max_time)
+            self.S_self = csr_matrix((scores, (log_rows, log_cols)), shape=(n_users, n_items))
+            if self.compact:
+                self.S_self = matrices.compact_csr(self.S_self)
+            stale = np.arange(n_users)
+        else:
+            touched = np.isin(log_rows, changed)
+            scores = matrices.recency_scores(self.log['t'][touched], self.alpha, max_time)
+            # Reborrows are summed in float64 before narrowing, like fit()
+            rebuilt = csr_matrix((scores, (np.searchsorted(changed, log_rows[touched]), log_cols[touched])),
+                                 shape=(len(changed), n_items))
+            if self.compact:
+                rebuilt = matrices.compact_csr(rebuilt)
+            self.S_self = replace_rows(self.S_self, changed, rebuilt)
+            # Users whose neighbour list changed or contains a touched user
+            pointing = self.Sim_User[:, changed].tocoo().row
+            stale = np.unique(np.concatenate([sim_changed, pointing]))
+
+        self._update_popular(log_cols)
+        if self.recs_cache is not None:
+            self.recs_cache[stale] = scoring.recommend_top_k(
+                self.S_self, self.Sim_User, self.w_history,
+                k=self.recs_cache.shape[1], user_rows=stale)
+        return self
+
+    def _grow_mappings(self, new_users, new_items):
+        # Adds unseen user / item ids and moves the existing rows / columns
+        users = np.union1d(self.users, new_users)
+        items = np.union1d(self.items, new_items)
+        if len(users) == len(self.users) and len(items) == len(self.items):
+            return
+
+        row_map = np.searchsorted(users, self.users)
+        col_map = np.searchsorted(items, self.items)
+        shape = (len(users), len(items))
+        self.S_self = reindex(self.S_self, row_map, col_map, shape)
+        self.X_bin = reindex(self.X_bin, row_map, col_map, shape)
+        self.Sim_User = reindex(self.Sim_User, row_map, row_map, (shape[0], shape[0]))
+        if self.recs_cache is not None:
+            # New users always borrowed something, so update() fills their rows
+            recs_cache = np.zeros((shape[0], self.recs_cache.shape[1]), dtype=self.recs_cache.dtype)
+            recs_cache[row_map] = col_map[self.recs_cache]
+            self.recs_cache = recs_cache
+        self.users, self.items = users, items
+
+    def named_matrices(self):
+        """
+        {name: matrix} of the CSR matrices the model holds, for
+        matrices.print_memory_report.
+        """
+        named = {'S_self': self.S_self, 'Sim_User': self.Sim_User}
+        if self.X_bin is not None:
+            named['X_bin'] = self.X_bin
+        return named
+
+    def cache_recommendations(self, k=10):
+        """
+        Precomputes the top-k of every user; recommend() then serves from
+        this cache and update() keeps it fresh.
+        """
+        self.recs_cache = scoring.recommend_top_k(self.S_self, self.Sim_User, self.w_history, k=k)
+        return self
+
+    def save(self, directory):
+        """
+        Writes the model as .npy files + params.json into directory.
+        """
+        os.makedirs(directory, exist_ok=True)
+        save_csr(directory, 'S_self', self.S_self)
+        save_csr(directory, 'Sim_User', self.Sim_User)
+        np.save(os.path.join(directory, 'users.npy'), self.users)
+        np.save(os.path.join(directory, 'items.npy'), self.items)
+        np.save(os.path.join(directory, 'popular.npy'), self.popular)
+        for col in LOG_COLUMNS:
+            np.save(os.path.join(directory, f"log_{col}.npy"), self.log[col])
+        with open(os.path.join(directory, 'params.json'), 'w') as f:
+            json.dump(self.params(), f, indent=2)
+
+    @classmethod
+    def load(cls, directory, mmap_mode='r'):
+        """
+        Opens a saved model. With mmap_mode='r' (default) nothing is read
+        up front; pages are loaded on demand by recommend().
+        """
+        with open(os.path.join(directory, 'params.json')) as f:
+            model = cls(**json.load(f))
+        model.users = np.load(os.path.join(directory, 'users.npy'), mmap_mode=mmap_mode)
+        model.items = np.load(os.path.join(directory, 'items.npy'), mmap_mode=mmap_mode)
+        model.popular = np.load(os.path.join(directory, 'popular.npy'), mmap_mode=mmap_mode)
+        model.log = {col: np.load(os.path.join(directory, f"log_{col}.npy"), mmap_mode=mmap_mode)
+                     for col in LOG_COLUMNS}
+        shape = (len(model.users), len(model.items))
+        model.S_self = load_csr(directory, 'S_self', shape, mmap_mode)
+        model.Sim_User = load_csr(directory, 'Sim_User', (shape[0], shape[0]), mmap_mode)
+        return model
+
+    def recommend(self, user_ids, k=10):
+        """
+        (len(user_ids), k) array of recommended item ids, best first.
+        Unknown users get the most borrowed items.
+        """
+        rows = user_rows(self.users, user_ids)
+        k = min(k, len(self.items))
+        top_indices = np.tile(self.popular[:k], (len(rows), 1))
+
+        known = rows >= 0
+        if self.recs_cache is not None and k <= self.recs_cache.shape[1]:
+            top_indices[known] = self.recs_cache[rows[known], :k]
+        elif known.any():
+            top_indices[known] = scoring.recommend_top_k(
+                self.S_self, self.Sim_User, self.w_history, k=k, user_rows=rows[known])
+        return np.asarray(self.items)[top_indices]
@@ -0,0 +1,179 @@
+"""
+Parallel grid search over a process pool.
+
+The parent builds every S_self (one per alpha) and Sim_User (one per
+(threshold, top_n)) once, then copies their CSR arrays (data / indices / indptr)
+into shared memory. Workers attach to those blocks at start-up and build
+zero-copy CSR views on them, so the matrices are never pickled per task.
+One task is one (alpha, threshold, top_n) cell: the worker builds its score
+blocks and sweeps the w values missing from the store.
+"""
+
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing.shared_memory import SharedMemory
+
+import numpy as np
+from scipy.sparse import csr_matrix
+
+from . import instrument, matrices
+from .grid_search import (config_params, evaluate_cell, print_header, print_result,
+                          similarity_grid, stored_results)
+
+CSR_ARRAYS = ('data', 'indices', 'indptr')
+
+# Per-worker state, filled by _init_worker
+_WORKER = {}
+
+
+def share_csr(matrix):
+    """
+    Copies the CSR arrays of matrix into new shared memory blocks.
+    Returns (spec, blocks): spec is a small picklable description used by
+    attach_csr, blocks must be kept alive and released with release().
+    """
+    matrix = matrix.tocsr()
+    spec = {'shape': matrix.shape, 'arrays': {}}
+    blocks = []
+    for name in CSR_ARRAYS:
+        array = getattr(matrix, name)
+        block = SharedMemory(create=True, size=max(array.nbytes, 1))
+        np.ndarray(array.shape, dtype=array.dtype, buffer=block.buf)[:] = array
+        spec['arrays'][name] = (block.name, array.dtype.str, array.shape)
+        blocks.append(block)
+    return spec, blocks
+
+
+def _attach_block(name):
+    try:
+        return SharedMemory(name=name, track=False)
+    except TypeError:
+        # Python < 3.13 has no track flag; pool workers share the parent's
+        # resource tracker, so registering the name again is harmless
+        return SharedMemory(name=name)
+
+
+def attach_csr(spec):
+    """
+    Zero-copy CSR view on the shared blocks described by spec.
+    Returns (matrix, blocks); blocks must outlive the matrix.
+    """
+    arrays, blocks = {}, []
+    for name, (block_name, dtype, shape) in spec['arrays'].items():
+        block = _attach_block(block_name)
+        arrays[name] = np.ndarray(shape, dtype=np.dtype(dtype), buffer=block.buf)
+        blocks.append(block)
+    matrix = csr_matrix((arrays['data'], arrays['indices'], arrays['indptr']),
+                        shape=spec['shape'], copy=False)
+    return matrix, blocks
+
+
+def release(blocks):
+    """
+    Closes and unlinks shared memory blocks created by share_csr.
+    """
+    for block in blocks:
+        block.close()
+        block.unlink()
+
+
+def _init_worker(self_specs, sim_specs, eval_rows, score_fn, k, metric):
+    _WORKER['S_self'] = {}
+    _WORKER['Sim_User'] = {}
+    _WORKER['blocks'] = []
+    for alpha, spec in self_specs.items():
+        _WORKER['S_self'][alpha], blocks = attach_csr(spec)
+        _WORKER['blocks'].extend(blocks)
+    for sim_key, spec in sim_specs.items():
+        _WORKER['Sim_User'][sim_key], blocks = attach_csr(spec)
+        _WORKER['blocks'].extend(blocks)
+    _WORKER['eval_rows'] = eval_rows
+    _WORKER['score_fn'] = score_fn
+    _WORKER['k'] = k
+    _WORKER['metric'] = metric
+
+
+def _evaluate_cell(alpha, thresh, top_n, weights):
+    # Only the weights of the cell missing from the store
+    return evaluate_cell(_WORKER['S_self'][alpha], _WORKER['Sim_User'][(thresh, top_n)],
+                         (alpha, thresh, top_n), _WORKER['eval_rows'], _WORKER['score_fn'],
+                         weights, _WORKER['k'], _WORKER['metric'])
+
+
+def _pool_context():
+    # fork lets score_fn be any callable (lambdas, closures); elsewhere it
+    # has to be picklable
+    if 'fork' in multiprocessing.get_all_start_methods():
+        return multiprocessing.get_context('fork')
+    return multiprocessing.get_context()
+
+
+def parallel_grid_search(train_df, users, items, eval_rows, score_fn, alphas, thresholds, weights,
+                         k=10, metric=None, top_ns=(None,), workers=None, compact=False,
+                         store=None, context=None, verbose=True):
+    """
+    Same contract and result order as grid_search.grid_search, with the
+    (alpha, threshold, top_n) cells spread over `workers` processes
+    (default: os.cpu_count()). Stored configs are skipped the same way;
+    only the parent process writes to the store.
+    """
+    workers = workers or os.cpu_count() or 1
+    shape = (len(users), len(items))
+    rows, cols = matrices.encode(train_df, users, items)
+    cells = [(alpha, thresh, top_n) for alpha in alphas for thresh in thresholds for top_n in top_ns]
+    cached = stored_results(store, context, cells, weights, compact, k, metric)
+    missing = [cell for cell in cells if any(cell + (w,) not in cached for w in weights)]
+    if verbose and store is not None:
+        print(f"  {len(cached)} configs already evaluated, {len(missing)} cells to compute")
+
+    computed = {}
+    blocks = []
+    try:
+        if missing:
+            start_build = time.time()
+            with instrument.span('grid_build') as build:
+                X_bin = matrices.interaction_matrix(rows, cols, shape, compact)
+                needed_thresholds = sorted({thresh for _, thresh, _ in missing})
+                raw_sim = matrices.blocked_jaccard(X_bin, min(needed_thresholds), compact=compact)
+                build.set(**instrument.nnz(X_bin=X_bin, raw_sim=raw_sim))
+
+            self_specs, sim_specs = {}, {}
+            for alpha in sorted({alpha for alpha, _, _ in missing}):
+                S_self = matrices.recency_matrix(train_df, rows, cols, alpha, shape, compact=compact)
+                self_specs[alpha], new_blocks = share_csr(S_self)
+                blocks.extend(new_blocks)
+            for sim_key, Sim_User in similarity_grid(raw_sim, needed_thresholds, top_ns).items():
+                sim_specs[sim_key], new_blocks = share_csr(Sim_User)
+                blocks.extend(new_blocks)
+            if verbose:
+                print(f"  Matrices built and shared in {time.time() - start_build:.1f}s "
+                      f"({workers} workers)")
+                matrices.print_memory_report({'X_bin': X_bin, 'Raw Sim': raw_sim})
+
+            with ProcessPoolExecutor(max_workers=workers, mp_context=_pool_context(),
+                                     initializer=_init_worker,
+                                     initargs=(self_specs, sim_specs, np.asarray(eval_rows),
+                                               score_fn, k, metric)) as pool:
+                futures = {cell: pool.submit(_evaluate_cell, *cell,
+                                             [w for w in weights if cell + (w,) not in cached])
+                           for cell in missing}
+                for cell, future in futures.items():
+                    for result in future.result():
+                        computed[cell + (result['w'],)] = result
+                        if store is not None:
+                            store.put(context, config_params(result, compact, k, metric), result)
+    finally:
+        release(blocks)
+
+    if verbose:
+        print_header()
+    results = []
+    for cell in cells:
+        for w in weights:
+            r = computed[cell + (w,)] if cell + (w,) in computed else cached[cell + (w,)]
+            results.append(r)
+            if verbose:
+                print_result(r)
+    return results
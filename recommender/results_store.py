@@ -0,0 +1,149 @@
+"""
+SQLite store of evaluated hyperparameter configs.
+
+Each row is one evaluated config, keyed by the run context (dataset
+fingerprint, split parameters, model version) and the canonical JSON of
+its hyperparameters, with its score, all metrics and timings. The grid
+search looks configs up before evaluating them and records the new ones,
+so widening the grid only costs the new cells:
+
+    store = ResultStore('cache/results.sqlite')
+    context = run_context(interactions, split_seed=42, test_size=0.2, ratio=0.8)
+    grid_search.grid_search(..., store=store, context=context)
+
+Past results can be queried from Python (store.query()) or the command line:
+
+    python -m recommender.results_store cache/results.sqlite [--top 10] [--dataset FP]
+"""
+
+import argparse
+import json
+import sqlite3
+import time
+
+from .split import dataset_fingerprint
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS results (
+    dataset TEXT NOT NULL,
+    split TEXT NOT NULL,
+    model_version TEXT NOT NULL,
+    params TEXT NOT NULL,
+    score REAL NOT NULL,
+    metrics TEXT,
+    collab_time REAL,
+    eval_time REAL,
+    neighbors REAL,
+    created_at REAL NOT NULL,
+    PRIMARY KEY (dataset, split, model_version, params)
+)
+"""
+
+
+def run_context(interactions_df, split_seed, test_size, ratio, model_version='user-cf-1'):
+    """
+    Everything besides the hyperparameters that a score depends on.
+    """
+    return {'dataset': dataset_fingerprint(interactions_df),
+            'split': f"per_user seed={split_seed} test_size={test_size} ratio={ratio}",
+            'model_version': model_version}
+
+
+def params_key(params):
+    """
+    Canonical JSON of a hyperparameter dict (sorted keys).
+    """
+    return json.dumps(params, sort_keys=True)
+
+
+class ResultStore:
+    """
+    Evaluated configs in an SQLite file.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.conn = sqlite3.connect(path)
+        self.conn.execute(SCHEMA)
+        self.conn.commit()
+
+    def close(self):
+        self.conn.close()
+
+    def lookup(self, context, params_list):
+        """
+        {params_key: result dict} of the configs of params_list already
+        stored for this context.
+        """
+        keys = [params_key(params) for params in params_list]
+        found = {}
+        cursor = self.conn.execute(
+            "SELECT params, score, metrics, collab_time, eval_time, neighbors FROM results "
+            "WHERE dataset = ? AND split = ? AND model_version = ?",
+            (context['dataset'], context['split'], context['model_version']))
+        wanted = set(keys)
+        for params, score, metrics, collab_time, eval_time, neighbors in cursor:
+            if params in wanted:
+                found[params] = dict(json.loads(params), score=score, collab_time=collab_time,
+                                     time=eval_time, neighbors=neighbors, cached=True,
+                                     **({'metrics': json.loads(metrics)} if metrics else {}))
+        return found
+
+    def put(self, context, params, result):
+        """
+        Records (or replaces) the result dict of one config.
+        """
+        metrics = result.get('metrics')
+        self.conn.execute(
+            "INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (context['dataset'], context['split'], context['model_version'], params_key(params),
+             result['score'], json.dumps(metrics) if metrics is not None else None,
+             result.get('collab_time'), result.get('time'), result.get('neighbors'), time.time()))
+        self.conn.commit()
+
+    def query(self, dataset=None, split=None, model_version=None, top=None):
+        """
+        Stored results (optionally filtered), best score first, as dicts.
+        """
+        clauses, values = [], []
+        for column, value in (('dataset', dataset), ('split', split), ('model_version', model_version)):
+            if value is not None:
+                clauses.append(f"{column} = ?")
+                values.append(value)
+        sql = "SELECT * FROM results"
+        if clauses:
+            sql += " WHERE " + " AND ".join(clauses)
+        sql += " ORDER BY score DESC"
+        if top is not None:
+            sql += f" LIMIT {int(top)}"
+        cursor = self.conn.execute(sql, values)
+        columns = [c[0] for c in cursor.description]
+        rows = []
+        for row in cursor:
+            row = dict(zip(columns, row))
+            row['params'] = json.loads(row['params'])
+            row['metrics'] = json.loads(row['metrics']) if row['metrics'] else None
+            rows.append(row)
+        return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Query stored hyperparameter results")
+    parser.add_argument('path', nargs='?', default='cache/results.sqlite')
+    parser.add_argument('--dataset', default=None, help="dataset fingerprint")
+    parser.add_argument('--model-version', default=None)
+    parser.add_argument('--top', type=int, default=20)
+    args = parser.parse_args()
+
+    store = ResultStore(args.path)
+    rows = store.query(dataset=args.dataset, model_version=args.model_version, top=args.top)
+    print(f"  {'Score':<9} {'Dataset':<22} {'Version':<11} {'Eval s':<7} Params")
+    for row in rows:
+        eval_time = '-' if row['eval_time'] is None else f"{row['eval_time']:.1f}"
+        print(f"  {row['score']:<9.5f} {row['dataset']:<22} {row['model_version']:<11} "
+              f"{eval_time:<7} {row['params']}")
+    store.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""
+Batched scoring for the user-based CF model.
+
+Score(u, .) = w * S_self[u] + (1 - w) * Sim_User[u] @ S_self
+
+Instead of one sparse row product and a full argsort per user, users are
+scored in blocks with a single sparse product per block, and the top-k is
+picked with argpartition.
+"""
+
+import numpy as np
+
+DEFAULT_BATCH_SIZE = 512
+
+
+def score_block(S_self, Sim_User, rows, w):
+    """
+    Dense (len(rows), n_items) final scores for a block of user rows.
+    """
+    history, collab = score_components(S_self, Sim_User, rows)
+    return blend(history, collab, w)
+
+
+def score_components(S_self, Sim_User, rows):
+    """
+    Sparse history and collaborative score blocks for the given user rows.
+    They do not depend on w, so a weight sweep can reuse them.
+    """
+    history = S_self[rows]
+    collab = Sim_User[rows] @ S_self
+    return history, collab
+
+
+def blend(history, collab, w):
+    """
+    Dense w * history + (1 - w) * collab.
+    """
+    return (history * w + collab * (1.0 - w)).toarray()
+
+
+def top_k(scores, k):
+    """
+    Column indices of the k best scores of every row, best first.
+    Like the unstable np.argsort of the original loop, the order among
+    equal scores is not specified.
+    """
+    k = min(k, scores.shape[1])
+    part = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+    part_scores = np.take_along_axis(scores, part, axis=1)
+    order = np.argsort(-part_scores, axis=1)
+    return np.take_along_axis(part, order, axis=1)
+
+
+def recommend_top_k(S_self, Sim_User, w, k=10, user_rows=None, batch_size=DEFAULT_BATCH_SIZE):
+    """
+    Top-k item columns for every row in user_rows (default: all users).
+    Returns an (n_users, k) int array of column indices into S_self.
+    """
+    S_self = S_self.tocsr()
+    Sim_User = Sim_User.tocsr()
+    if user_rows is None:
+        user_rows = np.arange(S_self.shape[0])
+    user_rows = np.asarray(user_rows)
+
+    k = min(k, S_self.shape[1])
+    recs = np.empty((len(user_rows), k), dtype=np.int64)
+    for start in range(0, len(user_rows), batch_size):
+        rows = user_rows[start:start + batch_size]
+        recs[start:start + len(rows)] = top_k(score_block(S_self, Sim_User, rows, w), k)
+    return recs
+
+
+def recommend_from_components(history, collab, w, k=10, batch_size=DEFAULT_BATCH_SIZE):
+    """
+    Same as recommend_top_k, from precomputed score_components() blocks.
+    """
+    history = history.tocsr()
+    collab = collab.tocsr()
+    k = min(k, history.shape[1])
+    recs = np.empty((history.shape[0], k), dtype=np.int64)
+    for start in range(0, history.shape[0], batch_size):
+        stop = start + batch_size
+        recs[start:stop] = top_k(blend(history[start:stop], collab[start:stop], w), k)
+    return recs
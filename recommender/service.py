@@ -0,0 +1,246 @@
+"""
+Local HTTP recommendation service.
+
+Loads a saved model directory once (memory-mapped, see model.py) and
+serves:
+
+    GET  /recommend/{user_id}?k=10   -> {"user_id": 42, "items": [...]}
+    POST /recommend                  <- {"user_ids": [1, 2, 3], "k": 10}
+                                     -> {"k": 10, "recommendations": {"1": [...], ...}}
+    POST /reload                     -> reloads the model directory, clears the cache
+    GET  /health                     -> {"status": "ok", "engine": ..., "cache": {...}}
+
+Unknown users get the most borrowed books, like model.recommend().
+Results go through a size-bounded LRU cache keyed by (user_id, k); a
+reload swaps the model and clears the cache, so no stale recommendation
+outlives the model that produced it. Cache misses of a batch are scored
+in one model.recommend() call.
+
+Built on the standard library (ThreadingHTTPServer), no extra dependency:
+
+    python -m recommender.service --model model --port 8000
+"""
+
+import argparse
+import json
+import os
+import re
+import threading
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import numpy as np
+
+from .als import ALSModel
+from .item_cf import ItemCFModel
+from .model import UserCFModel
+
+DEFAULT_CACHE_SIZE = 100_000
+DEFAULT_K = 10
+MAX_K = 100
+RECOMMEND_PATH = re.compile(r'^/recommend/(-?\d+)$')
+
+
+def load_model(directory):
+    """
+    Opens a model saved by UserCFModel, ALSModel or ItemCFModel.save(),
+    picking the class from the keys of its params.json.
+    """
+    with open(os.path.join(directory, 'params.json')) as f:
+        params = json.load(f)
+    if 'factors' in params:
+        return ALSModel.load(directory)
+    if 'similarity' in params:
+        return ItemCFModel.load(directory)
+    return UserCFModel.load(directory)
+
+
+class LRUCache:
+    """
+    Thread-safe least-recently-used cache holding at most maxsize entries.
+    """
+
+    def __init__(self, maxsize=DEFAULT_CACHE_SIZE):
+        self.maxsize = maxsize
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        with self.lock:
+            if key not in self.entries:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self.entries.move_to_end(key)
+            return self.entries[key]
+
+    def put(self, key, value):
+        with self.lock:
+            self.entries[key] = value
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.maxsize:
+                self.entries.popitem(last=False)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+    def stats(self):
+        with self.lock:
+            return {'size': len(self.entries), 'maxsize': self.maxsize,
+                    'hits': self.hits, 'misses': self.misses}
+
+
+class RecommendationService:
+    """
+    A loaded model + its result cache. reload() swaps in a freshly
+    loaded model directory and invalidates every cached result.
+    """
+
+    def __init__(self, model_dir, cache_size=DEFAULT_CACHE_SIZE):
+        self.model_dir = model_dir
+        self.cache = LRUCache(cache_size)
+        self.lock = threading.Lock()
+        self.model = load_model(model_dir)
+
+    def reload(self):
+        model = load_model(self.model_dir)
+        with self.lock:
+            # Swap and clear together, so no request caches a result of the old model
+            self.model = model
+            self.cache.clear()
+
+    def recommend(self, user_ids, k=DEFAULT_K):
+        """
+        {user_id: [item ids]} for every user id, from the cache when possible.
+        """
+        results, missing = {}, []
+        for user_id in user_ids:
+            items = self.cache.get((user_id, k))
+            if items is None:
+                missing.append(user_id)
+            else:
+                results[user_id] = items
+
+        if missing:
+            with self.lock:
+                model = self.model
+            # Scored outside the lock, so concurrent requests are not serialized
+            recs = model.recommend(np.array(missing), k=k).tolist()
+            with self.lock:
+                # A reload in between cleared the cache: don't refill it with the old model
+                cacheable = model is self.model
+                for user_id, items in zip(missing, recs):
+                    results[user_id] = items
+                    if cacheable:
+                        self.cache.put((user_id, k), items)
+        return results
+
+    def health(self):
+        return {'status': 'ok', 'engine': type(self.model).__name__,
+                'model_dir': self.model_dir, 'cache': self.cache.stats()}
+
+
+def parse_k(value):
+    """
+    k from a query string / JSON value, checked against 1..MAX_K.
+    """
+    k = int(value)
+    if not 1 <= k <= MAX_K:
+        raise ValueError(f"k must be between 1 and {MAX_K}")
+    return k
+
+
+def make_handler(service):
+    """
+    BaseHTTPRequestHandler subclass bound to service.
+    """
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def send_json(self, status, payload):
+            body = json.dumps(payload).encode()
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def read_json(self):
+            length = int(self.headers.get('Content-Length', 0))
+            return json.loads(self.rfile.read(length) or b'{}')
+
+        def do_GET(self):
+            url = urlparse(self.path)
+            if url.path == '/health':
+                return self.send_json(200, service.health())
+            match = RECOMMEND_PATH.match(url.path)
+            if not match:
+                return self.send_json(404, {'error': f"unknown path {url.path}"})
+            try:
+                k = parse_k(parse_qs(url.query).get('k', [DEFAULT_K])[0])
+            except ValueError as e:
+                return self.send_json(400, {'error': str(e)})
+            user_id = int(match.group(1))
+            items = service.recommend([user_id], k)[user_id]
+            self.send_json(200, {'user_id': user_id, 'items': items})
+
+        def do_POST(self):
+            path = urlparse(self.path).path
+            if path == '/reload':
+                service.reload()
+                return self.send_json(200, service.health())
+            if path != '/recommend':
+                return self.send_json(404, {'error': f"unknown path {path}"})
+            try:
+                request = self.read_json()
+                user_ids = [int(user_id) for user_id in request['user_ids']]
+                k = parse_k(request.get('k', DEFAULT_K))
+            except (ValueError, KeyError, TypeError) as e:
+                return self.send_json(400, {'error': f"expected {{'user_ids': [...], 'k': int}}: {e}"})
+            recs = service.recommend(user_ids, k)
+            self.send_json(200, {'k': k, 'recommendations': {str(u): recs[u] for u in user_ids}})
+
+        def log_message(self, format, *args):
+            # Quiet by default, a load test would flood stderr
+            pass
+
+    return Handler
+
+
+def make_server(model_dir, host='127.0.0.1', port=8000, cache_size=DEFAULT_CACHE_SIZE):
+    """
+    (server, service); call server.serve_forever() to start serving.
+    """
+    service = RecommendationService(model_dir, cache_size)
+    server = ThreadingHTTPServer((host, port), make_handler(service))
+    server.daemon_threads = True
+    return server, service
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local recommendation HTTP service")
+    parser.add_argument('--model', default='model', help="saved model directory (default: model)")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--cache-size', type=int, default=DEFAULT_CACHE_SIZE,
+                        help="max cached (user, k) results")
+    args = parser.parse_args()
+
+    server, service = make_server(args.model, args.host, args.port, args.cache_size)
+    print(f"✓ {type(service.model).__name__} loaded from {args.model}/")
+    print(f"  Serving on http://{args.host}:{server.server_address[1]}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
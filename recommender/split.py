@@ -0,0 +1,83 @@
+"""
+Train / test splits for offline evaluation.
+
+per_user_split reproduces the script's protocol: 20% of the users are test
+users, and for each of them the last 20% of their borrows (by time) are
+held out. It uses one sort plus groupby().cumcount() / size arithmetic
+instead of filtering the frame once per user.
+"""
+
+import hashlib
+import os
+
+import numpy as np
+import pandas as pd
+from sklearn.model_selection import train_test_split
+
+
+def per_user_split(interactions_df, test_size=0.2, ratio=0.8, seed=42):
+    """
+    Temporal holdout on a random subset of users.
+    Returns (train_df, test_df): train_df has every borrow of the train
+    users plus the first `ratio` of each test user's borrows, test_df the rest.
+    Both are sorted by (u, t).
+    """
+    users = sorted(interactions_df['u'].unique())
+    _, test_users = train_test_split(users, test_size=test_size, random_state=seed)
+
+    df = interactions_df.sort_values(['u', 't'])
+    position = df.groupby('u').cumcount().to_numpy()
+    n_borrows = df.groupby('u')['u'].transform('size').to_numpy()
+    cut = (n_borrows * ratio).astype(int)
+
+    is_test = df['u'].isin(test_users).to_numpy() & (position >= cut)
+    return df[~is_test], df[is_test]
+
+
+def global_time_split(interactions_df, cutoff=None, quantile=0.8):
+    """
+    Pure time cutoff: every borrow at or after `cutoff` (a timestamp, by
+    default the `quantile` of t) is held out, for all users.
+    Returns (train_df, test_df).
+    """
+    if cutoff is None:
+        cutoff = interactions_df['t'].quantile(quantile)
+    is_test = (interactions_df['t'] >= cutoff).to_numpy()
+    return interactions_df[~is_test], interactions_df[is_test]
+
+
+def test_sets(test_df):
+    """
+    Ground truth as {user: set(items)}, the test_actual format of the script.
+    """
+    return test_df.groupby('u')['i'].agg(set).to_dict()
+
+
+def dataset_fingerprint(interactions_df):
+    """
+    Short content hash of the (u, i, t) rows and their index labels, in
+    row order: a reordered or relabelled frame gets another fingerprint
+    (cached splits store index labels, so they only hold for the same rows
+    under the same labels).
+    """
+    hashed = pd.util.hash_pandas_object(interactions_df[['u', 'i', 't']], index=True)
+    digest = hashlib.sha256(hashed.to_numpy().tobytes()).hexdigest()
+    return f"{len(interactions_df)}-{digest[:12]}"
+
+
+def cached_per_user_split(interactions_df, cache_dir, test_size=0.2, ratio=0.8, seed=42):
+    """
+    per_user_split cached on disk as the index labels of the train / test
+    rows, keyed by seed, test_size, ratio and the dataset fingerprint.
+    """
+    os.makedirs(cache_dir, exist_ok=True)
+    key = f"split_seed{seed}_test{test_size}_ratio{ratio}_{dataset_fingerprint(interactions_df)}"
+    path = os.path.join(cache_dir, key + '.npz')
+
+    if os.path.exists(path):
+        cached = np.load(path)
+        return interactions_df.loc[cached['train']], interactions_df.loc[cached['test']]
+
+    train_df, test_df = per_user_split(interactions_df, test_size, ratio, seed)
+    np.savez(path, train=train_df.index.to_numpy(), test=test_df.index.to_numpy())
+    return train_df, test_df
@@ -0,0 +1,163 @@
+"""
+Synthetic (u, i, t) interactions for load and scaling tests.
+
+fit_profile() measures the real interactions.csv: per-user activity
+(borrows per user), item popularity, reborrow rate (share of borrows of
+a book the user already borrowed, ~26%) and the timestamp distribution.
+generate_chunks() then draws a dataset `scale` times larger with the same
+shapes:
+
+- users: scale x the real user count, each with an activity drawn from
+  the real per-user counts,
+- items: scale x the real catalogue; a new borrow picks a real book by
+  its popularity, then one of its `scale` copies uniformly (one copy for
+  scale <= 1), so the popularity skew is the real one at every scale,
+- reborrows: each borrow after a user's first is, with the fitted
+  probability, a repeat of one of that user's earlier borrows,
+- t: drawn from the real timestamp quantiles (same span), whole seconds.
+
+Users are generated chunk by chunk and appended to the CSV, so memory is
+bounded by chunk_users whatever the scale:
+
+    python -m recommender.synthetic --scales 10 100 1000 --out synthetic
+"""
+
+import argparse
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+DEFAULT_CHUNK_USERS = 100_000
+TIME_QUANTILES = 1001
+
+
+def fit_profile(interactions_df):
+    """
+    Distributions of the real data that generate_chunks() reproduces.
+    """
+    activity = interactions_df.groupby('u').size().to_numpy()
+    popularity = interactions_df.groupby('i').size().to_numpy()
+    t = interactions_df['t'].to_numpy()
+    reborrows = int(interactions_df.duplicated(['u', 'i']).sum())
+    return {
+        'activity': activity,
+        'popularity': popularity / popularity.sum(),
+        'reborrow_rate': reborrows / len(interactions_df),
+        # A user's first borrow is never a reborrow: probability per later borrow
+        'reborrow_prob': reborrows / (len(interactions_df) - len(activity)),
+        't_quantiles': np.quantile(t, np.linspace(0, 1, TIME_QUANTILES)),
+    }
+
+
+def _resolve_reborrows(items, source):
+    """
+    items[k] = items[source[k]] for every k with source[k] >= 0, where a
+    source can itself be a reborrow (always an earlier position).
+    Pointer jumping: log(chain length) vectorized passes.
+    """
+    root = np.where(source >= 0, source, np.arange(len(items)))
+    while True:
+        next_root = root[root]
+        if np.array_equal(next_root, root):
+            break
+        root = next_root
+    return items[root]
+
+
+def generate_users(profile, n_real_items, item_copies, first_user, n_users, rng):
+    """
+    DataFrame of the borrows of users first_user .. first_user + n_users - 1.
+    """
+    counts = rng.choice(profile['activity'], n_users)
+    starts = np.concatenate([[0], np.cumsum(counts)[:-1]])
+    n_rows = int(counts.sum())
+    user = np.repeat(np.arange(n_users), counts)
+    position = np.arange(n_rows) - starts[user]
+
+    # Fresh borrows: real book by popularity, then one of its copies
+    cdf = np.cumsum(profile['popularity'])
+    real_item = np.minimum(np.searchsorted(cdf, rng.random(n_rows)), n_real_items - 1)
+    items = rng.integers(0, item_copies, n_rows) * n_real_items + real_item
+
+    # Reborrows repeat one of the user's earlier borrows
+    reborrow = (position > 0) & (rng.random(n_rows) < profile['reborrow_prob'])
+    source = np.full(n_rows, -1)
+    source[reborrow] = starts[user[reborrow]] + (rng.random(reborrow.sum())
+                                                 * position[reborrow]).astype(np.int64)
+    items = _resolve_reborrows(items, source)
+
+    t = np.floor(np.interp(rng.random(n_rows), np.linspace(0, 1, TIME_QUANTILES),
+                           profile['t_quantiles']))
+    return pd.DataFrame({'u': user + first_user, 'i': items, 't': t})
+
+
+def generate_chunks(profile, scale, chunk_users=DEFAULT_CHUNK_USERS, seed=42):
+    """
+    Yields the synthetic dataset `scale` times the real one as DataFrames
+    of at most chunk_users users each.
+    """
+    rng = np.random.default_rng(seed)
+    n_users = int(round(len(profile['activity']) * scale))
+    n_real_items = len(profile['popularity'])
+    item_copies = max(1, int(round(scale)))
+    for first_user in range(0, n_users, chunk_users):
+        yield generate_users(profile, n_real_items, item_copies, first_user,
+                             min(chunk_users, n_users - first_user), rng)
+
+
+def write_csv(profile, scale, path, chunk_users=DEFAULT_CHUNK_USERS, seed=42):
+    """
+    Streams generate_chunks() into a u,i,t CSV. Returns the row count.
+    """
+    rows = 0
+    for chunk_index, chunk in enumerate(generate_chunks(profile, scale, chunk_users, seed)):
+        chunk.to_csv(path, mode='w' if chunk_index == 0 else 'a', header=chunk_index == 0,
+                     index=False)
+        rows += len(chunk)
+    return rows
+
+
+def summary(interactions_df):
+    """
+    The fitted statistics of a dataset, to compare synthetic vs real.
+    """
+    activity = interactions_df.groupby('u').size()
+    popularity = np.sort(interactions_df.groupby('i').size().to_numpy())[::-1]
+    top = max(1, len(popularity) // 100)
+    return {
+        'rows': len(interactions_df),
+        'users': len(activity),
+        'items': len(popularity),
+        'reborrow_rate': interactions_df.duplicated(['u', 'i']).mean(),
+        'activity_median': activity.median(),
+        'activity_p99': activity.quantile(0.99),
+        'top1pct_share': popularity[:top].sum() / popularity.sum(),
+        't_span_days': (interactions_df['t'].max() - interactions_df['t'].min()) / 86400,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Synthetic interactions fitted to interactions.csv")
+    parser.add_argument('--source', default='interactions.csv')
+    parser.add_argument('--scales', type=float, nargs='+', default=[10, 100, 1000])
+    parser.add_argument('--out', default='synthetic', help="output directory")
+    parser.add_argument('--chunk-users', type=int, default=DEFAULT_CHUNK_USERS)
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    real = pd.read_csv(args.source)
+    profile = fit_profile(real)
+    print(f"✓ Fitted on {len(real):,} interactions "
+          f"(reborrow rate {profile['reborrow_rate']:.1%})")
+    os.makedirs(args.out, exist_ok=True)
+    for scale in args.scales:
+        path = os.path.join(args.out, f"interactions_x{scale:g}.csv")
+        start = time.time()
+        rows = write_csv(profile, scale, path, args.chunk_users, args.seed)
+        print(f"  x{scale:<6g} {rows:>13,} rows -> {path} ({time.time() - start:.1f}s)")
+
+
+if __name__ == "__main__":
+    main()